@@ -0,0 +1,123 @@
+"""
+后台文件写入线程，两个游戏共用。
+
+游戏循环只把要写的内容放进队列，由工作线程完成磁盘操作，
+网络盘上的慢速写入不会再造成掉帧。同一文件的多次整体写入会合并为最后一次，
+写入先落到临时文件再原子替换；退出时 close() 会把队列中的内容全部写完。
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+
+def atomic_write(path, data):
+    """先写临时文件再替换，写到一半退出也不会留下损坏的文件"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class BackgroundWriter:
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.pending = {}  # 路径 -> (数据, 提交时间)，同一文件只保留最新内容
+        self.lock = threading.Lock()
+        self.closed = False
+
+        # 统计信息
+        self.writes = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.latencies = deque(maxlen=100)  # 最近的写入延迟（秒），从提交到写完
+
+        self.thread = threading.Thread(target=self.run, name="BackgroundWriter", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, item):
+        self.queue.put(item)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def write(self, path, data):
+        """整体替换文件内容，队列中还没写入的旧内容会被合并掉"""
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("BackgroundWriter 已关闭")
+            if path in self.pending:
+                self.coalesced += 1
+                self.pending[path] = (data, self.pending[path][1])
+                return
+            self.pending[path] = (data, time.perf_counter())
+        self.put(("write", path))
+
+    def call(self, func):
+        """在写入线程中按提交顺序执行 func，用于追加日志等不能合并的操作"""
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("BackgroundWriter 已关闭")
+        self.put(("call", (func, time.perf_counter())))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                kind, payload = item
+                if kind == "write":
+                    with self.lock:
+                        data, submitted = self.pending.pop(payload)
+                    atomic_write(payload, data)
+                else:
+                    func, submitted = payload
+                    func()
+                self.writes += 1
+                self.latencies.append(time.perf_counter() - submitted)
+            except Exception as e:
+                self.errors += 1
+                print(f"后台写入失败: {e}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """等待队列中的内容全部写完"""
+        self.queue.join()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "last_latency_ms": latencies[-1] * 1000 if latencies else 0.0,
+            "avg_latency_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "max_latency_ms": max(latencies) * 1000 if latencies else 0.0,
+        }
+
+
+_writer = None
+
+
+def get_writer():
+    """两个游戏共用的写入线程，第一次使用时启动"""
+    global _writer
+    if _writer is None:
+        _writer = BackgroundWriter()
+    return _writer
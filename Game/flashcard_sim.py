@@ -0,0 +1,276 @@
+"""
+单词闪卡游戏的无头模拟器。
+
+使用 翻牌模拟器.FlashcardEngine 的规则，不打开窗口，用机器人玩家批量模拟对局，
+用于调整 LEVELS 的时间限制和得分公式：
+    python flashcard_sim.py --games 10000 --level 0 --strategy perfect
+
+指定 --out 时进入批量模式，用进程池模拟大量对局，结果按块追加写入 CSV，
+不在内存中保存全部结果：
+    python flashcard_sim.py --games 1000000 --workers 8 --out results.csv
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import time
+from collections import Counter, deque
+from multiprocessing import Pool
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # 工作进程导入pygame时不打印欢迎信息
+
+from vocabulary import open_vocabulary
+from 翻牌模拟器 import LEVELS, FlashcardEngine
+
+RESULT_FIELDS = ["level", "strategy", "won", "moves", "matches", "time_used", "score"]
+
+
+class VirtualClock:
+    """模拟用的时钟，只有调用 advance 时时间才会前进"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class RandomStrategy:
+    """每次随机翻一张未配对的卡片，不记忆看过的卡片"""
+
+    def reset(self, engine, rng):
+        self.rng = rng
+
+    def observe(self, card):
+        pass
+
+    def candidates(self, engine):
+        return [card.index for card in engine.cards
+                if not card.matched and card not in engine.selected_cards]
+
+    def choose(self, engine):
+        return self.rng.choice(self.candidates(engine))
+
+
+class MemoryStrategy(RandomStrategy):
+    """记住最近看过的 capacity 张卡片（None 表示全部记住），优先翻已知的配对"""
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+
+    def reset(self, engine, rng):
+        super().reset(engine, rng)
+        self.memory = deque(maxlen=self.capacity)  # (卡片序号, 单词对)
+        self.seen = set()
+
+    def observe(self, card):
+        self.memory.append((card.index, card.word_pair))
+        self.seen.add(card.index)
+
+    def known_partner(self, engine, card):
+        for index, word_pair in self.memory:
+            if index != card.index and word_pair == card.word_pair and not engine.cards[index].matched:
+                return index
+        return None
+
+    def choose(self, engine):
+        # 已经翻开一张：记得另一张就翻它
+        if len(engine.selected_cards) == 1:
+            partner = self.known_partner(engine, engine.selected_cards[0])
+            if partner is not None:
+                return partner
+        # 还没翻牌：记忆里有完整的一对就先翻其中一张
+        else:
+            remembered = {}
+            for index, word_pair in self.memory:
+                card = engine.cards[index]
+                if card.matched or card in engine.selected_cards:
+                    continue
+                if word_pair in remembered and remembered[word_pair] != index:
+                    return index
+                remembered[word_pair] = index
+
+        # 否则优先翻没见过的卡片
+        candidates = self.candidates(engine)
+        unseen = [index for index in candidates if index not in self.seen]
+        return self.rng.choice(unseen or candidates)
+
+
+STRATEGIES = {
+    "random": RandomStrategy,
+    "perfect": MemoryStrategy,
+    "limited": lambda: MemoryStrategy(capacity=6),
+}
+
+
+def play_game(level, strategy, rng, click_time=1.0, time_limit=None, rows=None, cols=None, vocab=None):
+    """模拟一局游戏，click_time 是每次翻牌消耗的虚拟秒数，vocab 是外部词库文件"""
+    clock = VirtualClock()
+    vocabulary = open_vocabulary(vocab, len(LEVELS)) if vocab else None
+    engine = FlashcardEngine(clock=clock, rng=rng, vocabulary=vocabulary)
+    engine.start_game(level, rows, cols)
+    if time_limit is not None:
+        engine.time_limit = engine.remaining_time = time_limit
+    strategy.reset(engine, rng)
+
+    while engine.state == "playing":
+        card = engine.cards[strategy.choose(engine)]
+        engine.select_card(card)
+        strategy.observe(card)
+        clock.advance(click_time)
+        engine.update()
+
+    return {
+        "level": level,
+        "won": engine.matches == engine.total_pairs,
+        "moves": engine.moves,
+        "matches": engine.matches,
+        "time_used": min(clock() - engine.start_time, engine.time_limit),
+        "score": engine.score,
+    }
+
+
+def simulate(level, strategy_name, games, seed=None, **options):
+    """连续模拟多局，返回每局结果的列表"""
+    rng = random.Random(seed)
+    strategy = STRATEGIES[strategy_name]()
+    return [play_game(level, strategy, rng, **options) for _ in range(games)]
+
+
+def run_chunk(task):
+    """工作进程执行的一块模拟，按列返回结果"""
+    level, strategy_name, games, seed, options = task
+    results = simulate(level, strategy_name, games, seed, **options)
+    columns = {field: [r[field] for r in results] for field in RESULT_FIELDS if field != "strategy"}
+    columns["strategy"] = [strategy_name] * len(results)
+    return columns
+
+
+class StreamingSummary:
+    """边接收结果边统计分布，只保存每个取值的计数"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.histograms = {field: Counter() for field in ("moves", "time_used", "score")}
+
+    def add(self, columns):
+        self.games += len(columns["won"])
+        self.wins += sum(columns["won"])
+        for field, histogram in self.histograms.items():
+            histogram.update(columns[field])
+
+    def percentile(self, field, q):
+        histogram = self.histograms[field]
+        target = q * self.games
+        seen = 0
+        for value in sorted(histogram):
+            seen += histogram[value]
+            if seen > target:
+                return value
+        return max(histogram)
+
+    def summary(self):
+        summary = {"games": self.games, "win_rate": self.wins / self.games}
+        for field, histogram in self.histograms.items():
+            summary[field] = {
+                "mean": sum(value * count for value, count in histogram.items()) / self.games,
+                "p50": self.percentile(field, 0.5),
+                "p90": self.percentile(field, 0.9),
+            }
+        return summary
+
+
+def batch_tasks(levels, strategies, games, chunk_size, seed, options):
+    chunk_id = 0
+    for level in levels:
+        for name in strategies:
+            for start in range(0, games, chunk_size):
+                # 每块使用不同但可复现的种子
+                chunk_seed = None if seed is None else seed * 1000003 + chunk_id
+                yield level, name, min(chunk_size, games - start), chunk_seed, options
+                chunk_id += 1
+
+
+def run_batch(levels, strategies, games, out_path, workers=None, chunk_size=10000, seed=None, **options):
+    """用进程池模拟每个关卡和策略各 games 局，结果流式写入 out_path，返回各组的统计"""
+    summaries = {}
+    with open(out_path, "w", newline="", encoding="utf-8") as f, Pool(workers) as pool:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_FIELDS)
+        tasks = batch_tasks(levels, strategies, games, chunk_size, seed, options)
+        for columns in pool.imap_unordered(run_chunk, tasks):
+            writer.writerows(zip(*(columns[field] for field in RESULT_FIELDS)))
+            key = (columns["level"][0], columns["strategy"][0])
+            summaries.setdefault(key, StreamingSummary()).add(columns)
+    return {key: summary.summary() for key, summary in summaries.items()}
+
+
+def print_summary(level, name, summary, elapsed=None):
+    rate = f" ({summary['games'] / elapsed:.0f}局/秒)" if elapsed else ""
+    print(f"{LEVELS[level]['name']} [{name}] {summary['games']}局{rate} 胜率 {summary['win_rate']:.1%}")
+    for field in ("moves", "time_used", "score"):
+        stats = summary[field]
+        print(f"    {field}: 平均 {stats['mean']:.1f} | p50 {stats['p50']:.1f} | p90 {stats['p90']:.1f}")
+
+
+def summarize(results):
+    def percentile(values, q):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    wins = [r for r in results if r["won"]]
+    summary = {"games": len(results), "win_rate": len(wins) / len(results)}
+    for field in ("moves", "time_used", "score"):
+        values = [r[field] for r in results]
+        summary[field] = {
+            "mean": statistics.fmean(values),
+            "p50": percentile(values, 0.5),
+            "p90": percentile(values, 0.9),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单词闪卡游戏无头模拟")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--level", type=int, default=None, help="只模拟某一关，默认模拟全部关卡")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default=None,
+                        help="玩家策略，默认比较全部策略")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--click-time", type=float, default=1.0, help="每次翻牌消耗的秒数")
+    parser.add_argument("--time-limit", type=float, default=None, help="覆盖关卡的时间限制")
+    parser.add_argument("--vocab", default=None, help="外部词库文件（CSV/TSV/JSONL）")
+    parser.add_argument("--out", default=None, help="批量模式：结果写入的CSV文件")
+    parser.add_argument("--workers", type=int, default=None, help="批量模式的进程数，默认为CPU核数")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="批量模式每块的对局数")
+    args = parser.parse_args()
+
+    levels = [args.level] if args.level is not None else range(len(LEVELS))
+    strategies = [args.strategy] if args.strategy else sorted(STRATEGIES)
+    options = {"click_time": args.click_time, "time_limit": args.time_limit, "vocab": args.vocab}
+
+    if args.out:
+        start = time.perf_counter()
+        summaries = run_batch(levels, strategies, args.games, args.out, args.workers,
+                              args.chunk_size, args.seed, **options)
+        elapsed = time.perf_counter() - start
+        for (level, name), summary in sorted(summaries.items()):
+            print_summary(level, name, summary)
+        total = sum(summary["games"] for summary in summaries.values())
+        print(f"共 {total} 局，{total / elapsed:.0f}局/秒，结果已写入 {args.out}")
+        return
+
+    for level in levels:
+        for name in strategies:
+            start = time.perf_counter()
+            results = simulate(level, name, args.games, args.seed, **options)
+            print_summary(level, name, summarize(results), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+排行榜存储：只追加的记录日志 + 每个关卡的前N名小顶堆索引。
+
+新成绩以一行 JSON 追加到日志文件末尾，不再整体重写 leaderboard.json，
+多个会话同时写入也不会互相覆盖。日志过长时压缩为只包含前N名的新文件，
+并保留 leaderboard.json 导出以兼容旧版本。
+传入 writer（background_writer.BackgroundWriter）时，追加、压缩和导出都在后台线程进行，
+内存中的索引立即更新，游戏循环不会等待磁盘。
+"""
+import heapq
+import json
+import os
+import time
+import uuid
+
+from background_writer import atomic_write
+
+LOCK_TIMEOUT = 2.0  # 等待锁的最长秒数
+LOCK_STALE = 10.0  # 锁文件超过这个秒数视为上次异常退出留下的
+COMPACT_FACTOR = 4  # 日志记录数超过 前N名总数 * COMPACT_FACTOR 时压缩
+
+
+class FileLock:
+    """跨平台的简单文件锁，用 O_EXCL 创建锁文件"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > LOCK_STALE:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"无法获得锁: {self.path}")
+                time.sleep(0.01)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def push_top(heap, entry, top_n):
+    """把 entry 放进最多保留 top_n 个元素的小顶堆"""
+    if len(heap) < top_n:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+class LeaderboardStore:
+    def __init__(self, log_path="leaderboard.log", json_path="leaderboard.json", levels=4, top_n=10, writer=None):
+        self.log_path = log_path
+        self.json_path = json_path
+        self.lock = FileLock(log_path + ".lock")
+        self.top_n = top_n
+        self.writer = writer  # 提供 BackgroundWriter 时文件操作都在后台线程完成
+        self.heaps = {str(i): [] for i in range(levels)}  # 关卡 -> [(得分, -序号, 记录)]
+        self.seq = 0
+        self.offset = 0  # 日志中已经读取到的位置
+        self.generation = None  # 日志第一行的版本号，压缩后会变化
+        self.log_records = 0
+        self.local = {}  # 记录id -> (关卡, 记录)，本会话已加入索引、但还没从日志读回的记录
+        self.appended = set()  # local 中已经追加到日志的记录id
+        self.compacting = False
+
+        if not os.path.exists(self.log_path):
+            self.import_json()
+        self.refresh()
+
+    def submit(self, job):
+        if self.writer:
+            self.writer.call(job)
+        else:
+            job()
+
+    def import_json(self):
+        # 第一次运行时把旧的 leaderboard.json 迁移到日志
+        try:
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        lines = [self.encode(level_key, record) for level_key, records in data.items() for record in records]
+        with self.lock:
+            if not os.path.exists(self.log_path):
+                self.write_log(lines)
+
+    def write_log(self, lines):
+        # 日志第一行记录版本号，其他会话据此发现日志已被替换
+        header = (json.dumps({"generation": uuid.uuid4().hex}) + "\n").encode("utf-8")
+        atomic_write(self.log_path, header + b"".join(lines))
+
+    @staticmethod
+    def encode(level_key, record):
+        return (json.dumps({"level": level_key, **record}, ensure_ascii=False) + "\n").encode("utf-8")
+
+    @staticmethod
+    def decode(data):
+        # 逐行解析日志，跳过版本号和写了一半的行
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "level" in record:
+                yield record.pop("level"), record
+
+    def push(self, level_key, record):
+        # 同分时先进榜的排在前面，所以序号取负
+        push_top(self.heaps.setdefault(level_key, []), (record["score"], -self.seq, record), self.top_n)
+        self.seq += 1
+
+    def refresh(self):
+        # 读取日志中新增的记录（包括其他会话写入的）
+        try:
+            with open(self.log_path, "rb") as f:
+                header = f.readline()
+                try:
+                    generation = json.loads(header).get("generation")
+                except ValueError:
+                    generation = None
+                if generation != self.generation:
+                    self.reset()  # 日志被压缩替换过，重新读取
+                    self.generation = generation
+                f.seek(max(self.offset, f.tell() if generation else 0))
+                data = f.read()
+                start = f.tell() - len(data)
+        except OSError:
+            return
+        end = data.rfind(b"\n") + 1  # 只处理完整的行
+        for level_key, record in self.decode(data[:end]):
+            self.log_records += 1
+            if self.local.pop(record.get("id"), None):
+                self.appended.discard(record["id"])
+                continue  # 本会话的记录已经在索引里
+            self.push(level_key, record)
+        self.offset = start + end
+
+    def reset(self):
+        for heap in self.heaps.values():
+            heap.clear()
+        self.offset = 0
+        self.log_records = 0
+        # 已经追加到旧日志的本地记录，压缩后要么在新日志中重新读到，要么已经不在前N名，都不再保留
+        for record_id in list(self.appended):
+            self.local.pop(record_id, None)
+            self.appended.discard(record_id)
+        # 还没写进日志的本地记录保留在索引中
+        for level_key, record in list(self.local.values()):
+            self.push(level_key, record)
+
+    def add(self, level_key, record):
+        # 先更新内存中的索引，追加日志交给写入线程
+        record = dict(record, id=uuid.uuid4().hex[:12])
+        self.push(level_key, record)
+        self.local[record["id"]] = (level_key, record)
+        self.log_records += 1
+        line = self.encode(level_key, record)
+        self.submit(lambda: self.append_line(line, record["id"]))
+        if not self.compacting and self.log_records > self.top_n * len(self.heaps) * COMPACT_FACTOR:
+            self.compacting = True
+            self.log_records = self.top_n * len(self.heaps)  # 压缩后最多剩下这么多
+            self.submit(self.compact_log)
+
+    def append_line(self, line, record_id=None):
+        with self.lock:
+            # O_APPEND 保证一次写入完整地追加到文件末尾
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            if record_id in self.local:
+                self.appended.add(record_id)
+
+    def top(self, level_key):
+        return [record for _, _, record in sorted(self.heaps.get(level_key, []), reverse=True)]
+
+    def as_dict(self):
+        return {level_key: self.top(level_key) for level_key in self.heaps}
+
+    def compact_log(self):
+        # 把日志重写为只包含前N名的记录，直接读取文件，不修改内存中的索引
+        try:
+            with self.lock:
+                with open(self.log_path, "rb") as f:
+                    data = f.read()
+                heaps = {}
+                for seq, (level_key, record) in enumerate(self.decode(data)):
+                    push_top(heaps.setdefault(level_key, []), (record["score"], -seq, record), self.top_n)
+                lines = [self.encode(level_key, record)
+                         for level_key, heap in heaps.items()
+                         for _, _, record in sorted(heap, reverse=True)]
+                self.write_log(lines)
+        finally:
+            self.compacting = False  # 日志替换后 refresh() 会读到新的版本号
+
+    def export_json(self):
+        # 导出与旧版本相同格式的 leaderboard.json
+        data = {level_key: [{k: v for k, v in record.items() if k != "id"} for record in records]
+                for level_key, records in self.as_dict().items()}
+        data = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        if self.writer:
+            self.writer.write(self.json_path, data)
+        else:
+            atomic_write(self.json_path, data)
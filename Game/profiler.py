@@ -0,0 +1,175 @@
+"""
+帧时间分析器，两个游戏共用。
+
+用 with frame_profiler.span("名称") 包住需要计时的代码，同一帧内同名区段的耗时累加，
+每帧结束时写入环形缓冲，保存最近 PROFILE_FRAMES 帧，统计 p50/p95/p99。
+按 F3 显示/隐藏统计浮层（同时开关计时），按 F4 把统计和原始数据导出为 JSON。
+关闭时 span() 返回一个什么都不做的共享对象，每个区段只多一次方法调用，可以常驻在正式版本中。
+"""
+import json
+import time
+from array import array
+
+import pygame
+
+from background_writer import get_writer
+
+PROFILE_FRAMES = 600  # 环形缓冲保存的帧数
+OVERLAY_REFRESH = 0.5  # 浮层内容刷新间隔（秒）
+OVERLAY_FONT = "consolas,dejavusansmono,couriernew,monospace"
+OVERLAY_KEY = pygame.K_F3
+DUMP_KEY = pygame.K_F4
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, frames=PROFILE_FRAMES):
+        self.frames = frames
+        self.enabled = False
+        self.samples = {}  # 区段名 -> 每帧耗时（秒）的环形缓冲
+        self.current = {}  # 本帧各区段累计耗时
+        self.index = 0  # 下一帧写入的位置
+        self.count = 0  # 缓冲中有效的帧数
+        self.last_frame_end = None
+        self.overlay = None  # 缓存的浮层表面
+        self.overlay_time = 0
+        self.rect = None  # 上一次绘制浮层的区域
+        self.font = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.reset()
+        return self.enabled
+
+    def reset(self):
+        self.samples = {}
+        self.current = {}
+        self.index = 0
+        self.count = 0
+        self.last_frame_end = None
+        self.overlay = None
+        self.rect = None
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def end_frame(self):
+        """一帧结束：把本帧的区段耗时写入环形缓冲，"frame" 为两次调用之间的总时间"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.current["frame"] = now - self.last_frame_end
+        self.last_frame_end = now
+
+        for name in self.current:
+            if name not in self.samples:
+                self.samples[name] = array("d", bytes(8 * self.frames))
+        for name, buffer in self.samples.items():
+            buffer[self.index] = self.current.get(name, 0.0)
+        self.current = {}
+        self.index = (self.index + 1) % self.frames
+        self.count = min(self.count + 1, self.frames)
+
+    def history(self, name):
+        """按时间顺序返回某个区段的耗时（秒）"""
+        buffer = self.samples[name]
+        if self.count < self.frames:
+            return buffer[:self.count].tolist()
+        return buffer[self.index:].tolist() + buffer[:self.index].tolist()
+
+    def stats(self):
+        """各区段的平均值和百分位（毫秒）"""
+        result = {}
+        for name in self.samples:
+            values = sorted(self.history(name))
+            if not values:
+                continue
+
+            def percentile(q):
+                return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+            result[name] = {
+                "mean": sum(values) / len(values) * 1000,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": values[-1] * 1000,
+            }
+        return result
+
+    def render_overlay(self):
+        if self.font is None:
+            self.font = pygame.font.SysFont(OVERLAY_FONT, 15)  # 等宽字体，各列才能对齐
+        font = self.font
+        stats = self.stats()
+        lines = [f"{'span':<12}{'mean':>7}{'p50':>7}{'p95':>7}{'p99':>7}  ms ({self.count} frames)"]
+        for name, s in sorted(stats.items(), key=lambda item: (item[0] == "frame", item[0])):
+            lines.append(f"{name:<12}{s['mean']:7.2f}{s['p50']:7.2f}{s['p95']:7.2f}{s['p99']:7.2f}")
+        if "frame" in stats and stats["frame"]["mean"] > 0:
+            lines.append(f"fps {1000 / stats['frame']['mean']:.1f}")
+
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        width = max(text.get_width() for text in rendered) + 16
+        height = sum(text.get_height() for text in rendered) + 12
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 180))
+        y = 6
+        for text in rendered:
+            surface.blit(text, (8, y))
+            y += text.get_height()
+        return surface
+
+    def draw(self, surface, pos=(10, 10)):
+        """绘制统计浮层，返回绘制的区域；浮层内容每 OVERLAY_REFRESH 秒更新一次"""
+        if not self.enabled:
+            return None
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time > OVERLAY_REFRESH:
+            self.overlay = self.render_overlay()
+            self.overlay_time = now
+        self.rect = surface.blit(self.overlay, pos)
+        return self.rect
+
+    def dump(self, path=None):
+        """把统计和每帧原始数据（毫秒）交给后台线程写成 JSON，返回文件名"""
+        path = path or time.strftime("profile-%Y%m%d-%H%M%S.json")
+        data = {
+            "frames": self.count,
+            "stats": self.stats(),
+            "samples": {name: [round(v * 1000, 3) for v in self.history(name)] for name in self.samples},
+        }
+        get_writer().write(path, json.dumps(data, indent=2).encode("utf-8"))
+        return path
+
+
+frame_profiler = FrameProfiler()
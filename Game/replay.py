@@ -0,0 +1,263 @@
+"""
+输入录制与回放，两个游戏共用。
+
+游戏主循环通过输入源读取事件、鼠标位置和时间：
+    LiveInput  正常游戏，直接读取 pygame 和系统时间
+    Recorder   正常游戏，同时把每帧的时间、鼠标位置和输入事件录制下来
+    Replayer   从录制文件重放，不等待帧间隔，尽可能快地运行
+录制时每帧的时间固定为帧开始时的系统时间，随机数使用记录下来的种子，
+开局时会影响游戏的存档（学习记录等）也一并保存，因此回放的每一帧都与录制时相同。
+
+    python replay.py record flashcard trace.gtr     # 玩一局并录制
+    python replay.py record runner trace.gtr
+    python replay.py play trace.gtr --profile        # 无头回放，输出帧时间统计
+
+录制文件是 zlib 压缩的二进制流：文件头（种子、开始时间、游戏、存档），然后每帧
+(时间, 鼠标x, 鼠标y, 事件数) + 事件，最后是结束标记和结束时的游戏状态摘要。
+"""
+import argparse
+import importlib
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+import pygame
+
+TRACE_MAGIC = b"GTRACE01"
+FRAME = struct.Struct("<dhhH")  # 时间、鼠标位置、事件数
+END_OF_FRAMES = 0xFFFF
+KEY = struct.Struct("<iH")  # 按键、修饰键
+MOUSE_BUTTON = struct.Struct("<hhB")  # 位置、按键
+# 只录制游戏会读取的事件，鼠标移动通过每帧的鼠标位置还原
+RECORDED_EVENTS = (pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP,
+                   pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.USEREVENT)
+
+# 游戏名 -> 模块名，模块需要提供 play(source) 和 TRACE_FILES
+GAMES = {"flashcard": "翻牌模拟器", "runner": "光州跑男"}
+
+
+def pack_bytes(data):
+    return struct.pack("<I", len(data)) + data
+
+
+def encode_event(event):
+    data = struct.pack("<H", event.type)
+    if event.type == pygame.KEYDOWN:
+        data += KEY.pack(event.key, event.mod) + pack_bytes(event.unicode.encode("utf-8"))
+    elif event.type == pygame.KEYUP:
+        data += KEY.pack(event.key, event.mod)
+    elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        data += MOUSE_BUTTON.pack(event.pos[0], event.pos[1], event.button)
+    return data
+
+
+def state_digest(game):
+    """游戏结束时的状态摘要，用于确认回放与录制一致"""
+    fields = ("state", "level", "score", "moves", "matches")
+    return repr([getattr(game, name, None) for name in fields])
+
+
+class LiveInput:
+    """正常游戏：直接读取 pygame 事件、鼠标位置和系统时间"""
+
+    def clock(self):
+        return time.time()
+
+    def poll(self):
+        return pygame.event.get()
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()
+
+    def tick(self, clock, fps):
+        clock.tick(fps)
+
+
+class Recorder(LiveInput):
+    def __init__(self, game_name, state_files=(), seed=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        random.seed(self.seed)
+        self.now = time.time()
+        self.mouse = (0, 0)
+        self.frames = 0
+
+        self.data = bytearray(TRACE_MAGIC)
+        self.data += struct.pack("<Qd", self.seed, self.now) + pack_bytes(game_name.encode("utf-8"))
+        files = {path: open(path, "rb").read() for path in state_files if os.path.exists(path)}
+        self.data += struct.pack("<H", len(files))
+        for path, content in files.items():
+            self.data += pack_bytes(path.encode("utf-8")) + pack_bytes(content)
+
+    def clock(self):
+        return self.now  # 同一帧内时间不变，回放时才能完全一致
+
+    def poll(self):
+        self.now = time.time()
+        events = [event for event in pygame.event.get() if event.type in RECORDED_EVENTS]
+        self.mouse = pygame.mouse.get_pos()
+        self.data += FRAME.pack(self.now, self.mouse[0], self.mouse[1], len(events))
+        for event in events:
+            self.data += encode_event(event)
+        self.frames += 1
+        return events
+
+    def mouse_pos(self):
+        return self.mouse
+
+    def save(self, path, game=None):
+        self.data += FRAME.pack(self.now, 0, 0, END_OF_FRAMES)
+        self.data += pack_bytes(state_digest(game).encode("utf-8") if game else b"")
+        with open(path, "wb") as f:
+            f.write(zlib.compress(bytes(self.data)))
+
+
+class Replayer(LiveInput):
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = zlib.decompress(f.read())
+        if not self.data.startswith(TRACE_MAGIC):
+            raise ValueError(f"不是录制文件: {path}")
+        self.pos = len(TRACE_MAGIC)
+        self.seed, self.now = self.unpack(struct.Struct("<Qd"))  # 种子和录制开始时间
+        self.game_name = self.read_bytes().decode("utf-8")
+        count, = self.unpack(struct.Struct("<H"))
+        self.state_files = {}
+        for _ in range(count):
+            name = self.read_bytes().decode("utf-8")
+            self.state_files[name] = self.read_bytes()
+        self.mouse = (0, 0)
+        self.frames = 0
+        self.finished = False
+        self.digest = None
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.data, self.pos)
+        self.pos += layout.size
+        return values
+
+    def read_bytes(self):
+        length, = self.unpack(struct.Struct("<I"))
+        self.pos += length
+        return self.data[self.pos - length:self.pos]
+
+    def decode_event(self):
+        event_type, = self.unpack(struct.Struct("<H"))
+        if event_type == pygame.KEYDOWN:
+            key, mod = self.unpack(KEY)
+            return pygame.event.Event(event_type, key=key, mod=mod, unicode=self.read_bytes().decode("utf-8"))
+        if event_type == pygame.KEYUP:
+            key, mod = self.unpack(KEY)
+            return pygame.event.Event(event_type, key=key, mod=mod)
+        if event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            x, y, button = self.unpack(MOUSE_BUTTON)
+            return pygame.event.Event(event_type, pos=(x, y), button=button)
+        return pygame.event.Event(event_type)
+
+    def clock(self):
+        return self.now
+
+    def poll(self):
+        pygame.event.clear()  # 丢弃真实的事件（包括定时器），只使用录制的事件
+        if self.finished:
+            return [pygame.event.Event(pygame.QUIT)]
+        self.now, x, y, count = self.unpack(FRAME)
+        if count == END_OF_FRAMES:
+            self.finished = True
+            self.digest = self.read_bytes().decode("utf-8") or None
+            return [pygame.event.Event(pygame.QUIT)]
+        self.mouse = (x, y)
+        self.frames += 1
+        return [self.decode_event() for _ in range(count)]
+
+    def mouse_pos(self):
+        return self.mouse
+
+    def tick(self, clock, fps):
+        pass  # 不等待，尽可能快地回放
+
+    def read_digest(self):
+        """跳过游戏退出后剩余的帧，返回录制结束时的状态摘要"""
+        while not self.finished:
+            self.poll()
+        return self.digest
+
+    def restore_state(self, directory):
+        for name, content in self.state_files.items():
+            path = os.path.join(directory, name)
+            os.makedirs(os.path.dirname(path) or directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+
+def record(game_name, path):
+    module = importlib.import_module(GAMES[game_name])
+    recorder = Recorder(game_name, module.TRACE_FILES)
+    game = None
+    try:
+        game = module.play(recorder)
+    finally:
+        recorder.save(path, game)
+        print(f"已录制 {recorder.frames} 帧到 {path}")
+
+
+def replay(path, profile=False):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    replayer = Replayer(path)
+    module = importlib.import_module(GAMES[replayer.game_name])
+
+    # 在临时目录中回放，恢复录制时的存档，也不会改动真实的存档
+    with tempfile.TemporaryDirectory() as directory:
+        replayer.restore_state(directory)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            random.seed(replayer.seed)
+            from profiler import frame_profiler
+            if profile and not frame_profiler.enabled:
+                frame_profiler.toggle()
+            start = time.perf_counter()
+            game = module.play(replayer)
+            elapsed = time.perf_counter() - start
+            from background_writer import get_writer
+            get_writer().flush()
+        finally:
+            os.chdir(cwd)
+
+    print(f"回放 {replayer.frames} 帧，用时 {elapsed:.2f}秒（{replayer.frames / elapsed:.0f}帧/秒）")
+    digest = replayer.read_digest()
+    if digest:
+        result = "一致" if state_digest(game) == digest else f"不一致: {state_digest(game)}"
+        print(f"结束状态 {digest} {result}")
+    if profile:
+        for name, stats in sorted(frame_profiler.stats().items()):
+            print(f"    {name:<12} 平均 {stats['mean']:.3f} | p50 {stats['p50']:.3f} | "
+                  f"p95 {stats['p95']:.3f} | p99 {stats['p99']:.3f} ms")
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制和回放游戏输入")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="正常游戏并录制输入")
+    record_parser.add_argument("game", choices=sorted(GAMES))
+    record_parser.add_argument("path")
+    play_parser = commands.add_parser("play", help="无头回放录制文件")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--profile", action="store_true", help="输出各区段的帧时间统计")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.game, args.path)
+    else:
+        replay(os.path.abspath(args.path), args.profile)
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
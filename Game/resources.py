@@ -0,0 +1,236 @@
+"""
+资源加载管线，两个游戏共用。
+
+资源清单 assets.json 按游戏列出字体、音效和背景音乐，start() 之后由线程池并行读取和解码，
+游戏循环不必等待：
+    font(name)   第一次使用时如果还没加载好，就等待它加载完（还没开始加载时在当前线程加载）
+    play(name)   音效加载好了才播放，否则什么也不做
+    loop(name)   循环播放背景音乐，还没加载好时记下来，加载完成后自动开始
+    progress()   已加载的比例，菜单据此画进度条；start() 也可以传入 on_progress 回调
+解码后的字体和音效按 (路径, 修改时间, 参数) 缓存，重新开局或多次登记同一文件不会重复解码，
+文件修改后会重新加载。背景音乐由 pygame.mixer.music 边播放边解码，不整首解码到内存，同时只能登记一首。
+静音运行时不初始化音频设备，也不加载音效和音乐。各资源的加载耗时记录在 timings 中。
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets.json")
+LOADER_THREADS = 4
+
+
+def resolve(path, directory):
+    """相对路径先在当前目录找（与以前一致），找不到再到资源清单所在的目录找"""
+    if path is None or os.path.exists(path):
+        return path
+    candidate = os.path.join(directory, path)
+    return candidate if os.path.exists(candidate) else path
+
+
+class AssetCache:
+    """解码后的资源，按 (种类, 路径, 修改时间, 参数) 缓存，多个线程共用"""
+
+    def __init__(self):
+        self.assets = {}
+        self.lock = threading.Lock()
+
+    def get(self, kind, path, param, decode):
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        key = (kind, path, mtime, param)
+        with self.lock:
+            asset = self.assets.get(key)
+        if asset is None:
+            asset = decode()
+            if asset is not None:
+                with self.lock:
+                    asset = self.assets.setdefault(key, asset)
+        return asset
+
+    def clear(self):
+        with self.lock:
+            self.assets.clear()
+
+
+asset_cache = AssetCache()
+# SDL_ttf 的字体共用一个 FreeType 实例，字体只能逐个打开；音效可以并行解码
+font_lock = threading.Lock()
+
+
+class ResourceManager:
+    def __init__(self):
+        self.specs = {}  # 名称 -> (种类, 参数)
+        self.loaded = {}  # 名称 -> 字体、音效或音乐（加载失败为 None）
+        self.timings = {}  # 名称 -> 加载耗时（秒）
+        self.futures = {}  # 名称 -> 线程池中的加载任务
+        self.lock = threading.Lock()
+        self.audio_lock = threading.Lock()
+        self.started = None
+        self.finished = None
+        self.on_progress = None
+        self.pending_loop = None  # 等待加载完成后循环播放的音乐
+        self.muted = False
+        self.audio_ready = False
+
+    def add_font(self, name, path, size, fallback=None):
+        """path 加载失败时使用系统字体 fallback，path 为 None 时使用 pygame 默认字体"""
+        self.specs[name] = ("font", (path, size, fallback))
+
+    def add_sound(self, name, path):
+        self.specs[name] = ("sound", (path,))
+
+    def add_music(self, name, path, volume=1.0):
+        self.specs[name] = ("music", (path, volume))
+
+    def load_manifest(self, game, path=MANIFEST):
+        """登记资源清单中某个游戏的全部资源"""
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)[game]
+        directory = os.path.dirname(os.path.abspath(path))
+        for entry in entries:
+            asset_path = resolve(entry["path"], directory)
+            if entry["kind"] == "font":
+                self.add_font(entry["name"], asset_path, entry["size"], entry.get("fallback"))
+            elif entry["kind"] == "sound":
+                self.add_sound(entry["name"], asset_path)
+            elif entry["kind"] == "music":
+                self.add_music(entry["name"], asset_path, entry.get("volume", 1.0))
+            else:
+                raise ValueError(f"未知的资源种类: {entry['kind']}")
+
+    def start(self, muted=False, on_progress=None):
+        """在线程池中加载全部资源，字体最先提交；on_progress(已完成, 总数, 名称) 在加载线程中调用"""
+        if self.started is not None:
+            return  # 已经在加载（跑男重新开局时会再次调用）
+        self.muted = muted
+        self.on_progress = on_progress
+        self.started = time.perf_counter()
+        executor = ThreadPoolExecutor(LOADER_THREADS, thread_name_prefix="AssetLoader")
+        for name in sorted(self.specs, key=lambda name: self.specs[name][0] != "font"):
+            if name not in self.loaded:
+                self.futures[name] = executor.submit(self.load, name)
+        executor.shutdown(wait=False)  # 已提交的任务照常完成，线程随后退出
+
+    def load(self, name):
+        start = time.perf_counter()
+        kind, spec = self.specs[name]
+        if kind == "font":
+            asset = self.load_font(*spec)
+        elif kind == "sound":
+            asset = self.load_sound(*spec)
+        else:
+            asset = self.load_music(*spec)
+        with self.lock:
+            self.loaded[name] = asset
+            self.timings[name] = time.perf_counter() - start
+            done = len(self.loaded)
+            if done == len(self.specs):
+                self.finished = time.perf_counter()
+            play_now = self.pending_loop == name
+        if play_now:
+            self.start_music(name)
+        if self.on_progress:
+            self.on_progress(done, len(self.specs), name)
+        return asset
+
+    def load_font(self, path, size, fallback):
+        def decode():
+            with font_lock:
+                try:
+                    return pygame.font.Font(path, size)
+                except (OSError, pygame.error):  # 文件不存在或无法解析
+                    return pygame.font.SysFont(fallback, size)
+        return asset_cache.get("font", path, size, decode)
+
+    def init_audio(self):
+        """只在第一次加载音效或音乐时初始化音频设备，返回音频是否可用"""
+        with self.audio_lock:
+            if not self.audio_ready and not self.muted:
+                start = time.perf_counter()
+                try:
+                    pygame.mixer.init()
+                    self.audio_ready = True
+                except pygame.error as e:
+                    print(f"无法初始化音频，游戏将以静音模式运行: {e}")
+                    self.muted = True
+                self.timings["mixer"] = time.perf_counter() - start
+            return self.audio_ready
+
+    def load_sound(self, path):
+        if self.muted or not self.init_audio():
+            return None
+
+        def decode():
+            try:
+                return pygame.mixer.Sound(path)
+            except (pygame.error, FileNotFoundError):
+                print(f"音效文件 {path} 未找到，将不播放")
+                return None
+        return asset_cache.get("sound", path, None, decode)
+
+    def load_music(self, path, volume):
+        if self.muted or not self.init_audio():
+            return None
+        try:
+            pygame.mixer.music.load(path)  # 只打开文件，播放时由 mixer.music 流式解码
+        except (pygame.error, FileNotFoundError):
+            print(f"音乐文件 {path} 未找到，将不播放")
+            return None
+        return path
+
+    def font(self, name):
+        font = self.loaded.get(name)
+        if font is None:
+            future = self.futures.get(name)
+            font = future.result() if future else self.load(name)
+        return font
+
+    def play(self, name):
+        sound = self.loaded.get(name)
+        if sound is not None:
+            sound.play()
+
+    def loop(self, name):
+        """循环播放背景音乐；还没加载好时，加载完成后自动开始"""
+        with self.lock:
+            if name not in self.loaded:
+                self.pending_loop = name
+                return
+        self.start_music(name)
+
+    def start_music(self, name):
+        self.pending_loop = None
+        path = self.loaded.get(name)
+        if path is None:
+            return
+        try:
+            pygame.mixer.music.set_volume(self.specs[name][1][1])
+            pygame.mixer.music.play(-1)
+        except pygame.error as e:
+            print(f"无法播放音乐 {path}: {e}")
+
+    def ready(self, kind=None):
+        """登记的资源（或某一种资源）是否都已加载"""
+        return all(name in self.loaded for name, (k, _) in self.specs.items() if kind in (None, k))
+
+    def progress(self):
+        return len(self.loaded) / len(self.specs) if self.specs else 1.0
+
+    def draw_progress(self, surface, rect, color=(255, 255, 255), back_color=(80, 80, 80)):
+        """画加载进度条"""
+        radius = rect.height // 2
+        pygame.draw.rect(surface, back_color, rect, border_radius=radius)
+        width = int(rect.width * self.progress())
+        if width > 0:
+            pygame.draw.rect(surface, color, (rect.x, rect.y, width, rect.height), border_radius=radius)
+
+    def report(self):
+        total = ((self.finished or time.perf_counter()) - self.started) * 1000 if self.started else 0
+        details = ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.timings.items())
+        return f"资源加载 {total:.0f}ms（{details}）"
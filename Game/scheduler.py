@@ -0,0 +1,182 @@
+"""
+间隔重复（SM-2）调度：记录每个单词的复习结果，开局时优先抽取到期的单词。
+
+每个学习者一个只追加的记录文件，每次复习追加一行该单词的最新状态，
+不重写整个文件；启动时按行重放得到每个单词的状态，文件过长时压缩为每词一行。
+每个难度一个按到期时间排序的小顶堆，单词状态更新后旧的堆条目在弹出时跳过。
+"""
+import heapq
+import json
+import os
+
+from background_writer import atomic_write
+
+DAY = 86400
+RELEARN_DELAY = 600  # 答错的单词 10 分钟后再次到期
+MIN_EASE = 1.3
+COMPACT_FACTOR = 2  # 记录行数超过单词数 * COMPACT_FACTOR 时压缩
+COMPACT_MIN_LINES = 1000
+SRS_DIR = "learners"
+
+
+def parse_lines(lines):
+    """解析多行 JSON，跳过无法解析的行"""
+    try:
+        return json.loads(b"[" + b",".join(lines) + b"]")
+    except ValueError:
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # 写了一半的行
+        return records
+
+
+class WordState:
+    __slots__ = ("word", "meaning", "level", "ease", "interval", "reps", "due")
+
+    def __init__(self, word, meaning, level, ease=2.5, interval=0, reps=0, due=0):
+        self.word = word
+        self.meaning = meaning
+        self.level = level
+        self.ease = ease
+        self.interval = interval  # 天
+        self.reps = reps  # 连续答对次数
+        self.due = due  # 到期时间（秒）
+
+    def review(self, quality, now):
+        # SM-2：quality 为 0~5，小于 3 视为忘记
+        if quality < 3:
+            self.reps = 0
+            self.interval = 0
+            self.due = now + RELEARN_DELAY
+        else:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = 1
+            elif self.reps == 2:
+                self.interval = 6
+            else:
+                self.interval = round(self.interval * self.ease, 2)
+            self.due = now + self.interval * DAY
+            # 忘记时只重新开始计数，不改变难度系数
+            self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    def encode(self):
+        return (json.dumps({"w": self.word, "m": self.meaning, "l": self.level, "e": round(self.ease, 3),
+                            "i": self.interval, "r": self.reps, "d": self.due}, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class Scheduler:
+    def __init__(self, learner="default", directory=SRS_DIR, writer=None):
+        self.path = os.path.join(directory, f"{learner}.srs.log")
+        self.writer = writer  # 提供 BackgroundWriter 时追加和压缩在后台线程进行
+        self.states = {}  # (单词, 释义) -> WordState
+        self.heaps = {}  # 难度 -> [(到期时间, 序号, (单词, 释义))]
+        self.seq = 0
+        self.log_lines = 0
+        self.compacting = False
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+    def submit(self, job):
+        if self.writer:
+            self.writer.call(job)
+        else:
+            job()
+
+    def load(self):
+        # 按顺序重放记录，后面的行覆盖同一单词的旧状态
+        try:
+            with open(self.path, "rb") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+        # 整个文件一次解析比逐行 json.loads 快得多；通常只有最后一行可能写了一半
+        records = parse_lines(lines[:-1]) + parse_lines(lines[-1:])
+        for d in records:
+            try:
+                state = WordState(d["w"], d["m"], d["l"], d["e"], d["i"], d["r"], d["d"])
+            except (KeyError, TypeError):
+                continue
+            self.states[(state.word, state.meaning)] = state
+        self.log_lines = len(records)
+        self.rebuild_heaps()
+
+    def rebuild_heaps(self):
+        self.heaps = {}
+        for key, state in self.states.items():
+            self.heaps.setdefault(state.level, []).append((state.due, self.seq, key))
+            self.seq += 1
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def push(self, key, state):
+        heapq.heappush(self.heaps.setdefault(state.level, []), (state.due, self.seq, key))
+        self.seq += 1
+
+    def due(self, level, k, now):
+        """返回最多 k 个已到期的单词对，最早到期的在前"""
+        heap = self.heaps.get(level, [])
+        found = []
+        while heap and len(found) < k and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            state = self.states.get(entry[2])
+            if state is None or state.due != entry[0] or state.level != level:
+                continue  # 单词状态已更新，这是旧条目
+            found.append(entry)
+        for entry in found:
+            heapq.heappush(heap, entry)  # 复习之前仍然是到期状态
+        return [key for _, _, key in found]
+
+    def prefer_new(self, candidates, k, exclude=()):
+        """从候选单词对中选出 k 个：先选没学过的，再选还没到期的，不够时重复使用"""
+        exclude = set(exclude)
+        candidates = [pair for pair in dict.fromkeys(candidates) if pair not in exclude]
+        fresh = [pair for pair in candidates if pair not in self.states]
+        known = sorted((pair for pair in candidates if pair in self.states), key=lambda pair: self.states[pair].due)
+        chosen = (fresh + known)[:k]
+        while chosen and len(chosen) < k:
+            chosen.append(chosen[len(chosen) % len(fresh + known)])
+        return chosen
+
+    def review(self, word_pair, level, quality, now):
+        """记录一次复习结果并追加到学习记录"""
+        state = self.states.get(word_pair)
+        if state is None:
+            state = self.states[word_pair] = WordState(word_pair[0], word_pair[1], level)
+        state.level = level
+        state.review(quality, now)
+        self.push(word_pair, state)
+
+        line = state.encode()
+        self.submit(lambda: self.append_line(line))
+        self.log_lines += 1
+        if (not self.compacting and self.log_lines > COMPACT_MIN_LINES
+                and self.log_lines > len(self.states) * COMPACT_FACTOR):
+            self.compacting = True
+            self.log_lines = len(self.states)
+            self.submit(self.compact_log)
+
+        # 旧的堆条目太多时重建
+        heap = self.heaps[level]
+        if len(heap) > 2 * len(self.states) + 64:
+            self.rebuild_heaps()
+
+    def append_line(self, line):
+        with open(self.path, "ab") as f:
+            f.write(line)
+
+    def compact_log(self):
+        # 读取记录文件，每个单词只保留最后一行，不修改内存中的状态
+        latest = {}
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    d = json.loads(line)
+                    latest[(d["w"], d["m"])] = line if line.endswith(b"\n") else line + b"\n"
+                except (ValueError, KeyError):
+                    continue
+        atomic_write(self.path, b"".join(latest.values()))
+        self.compacting = False
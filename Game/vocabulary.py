@@ -0,0 +1,163 @@
+"""
+外部词库：从 CSV/TSV/JSONL 文件按难度抽取单词对，不把整个文件读进内存。
+
+第一次打开某个词库时扫描一遍文件，记录每一行的字节偏移并按难度分桶，
+写成紧凑的二进制索引缓存起来（以文件内容的 SHA-1 命名，文件改动后自动重建）。
+之后启动只需内存映射词库和索引，抽样时按偏移直接读取对应的行。
+
+文件格式：
+    CSV/TSV  每行 单词,释义[,难度]，第一行以 word 开头时视为表头跳过
+    JSONL    每行 {"word": ..., "meaning": ..., "level": ...}，level 可省略
+难度为从 0 开始的关卡序号；没有给出时按单词长度划分。
+CSV 字段内不能包含换行。
+"""
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+
+from background_writer import atomic_write
+
+INDEX_MAGIC = b"VOCIDX01"
+HASH_CHUNK = 1 << 20
+DIFFICULTY_LENGTHS = (5, 8, 11)  # 没有难度列时：单词长度 <=5 为初级，<=8 为中级，以此类推
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "flashcard_vocab")
+
+
+def map_file(path):
+    """只读内存映射整个文件；空文件无法映射，返回空的 bytes"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def file_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class Vocabulary:
+    def __init__(self, path, levels=4, cache_dir=CACHE_DIR):
+        self.path = path
+        self.levels = levels
+        self.format = os.path.splitext(path)[1].lower().lstrip(".")
+        if self.format not in ("csv", "tsv", "jsonl"):
+            raise ValueError(f"不支持的词库格式: {path}")
+
+        start = time.perf_counter()
+        self.data = map_file(path)  # 空词库为 b""，所有难度都没有词条
+
+        index_path = os.path.join(cache_dir, f"{file_hash(path)}-{levels}.idx")
+        # 写到一半的空索引文件视为没有缓存，重新生成
+        self.from_cache = os.path.exists(index_path) and os.path.getsize(index_path) > 0
+        if not self.from_cache:
+            os.makedirs(cache_dir, exist_ok=True)
+            atomic_write(index_path, self.build_index())
+        self.load_index(index_path)
+        self.load_time = time.perf_counter() - start
+
+    def parse_line(self, line, first=False):
+        """把一行解析为 (单词, 释义, 难度)，表头（只可能是第一行 first）、空行和无法解析的行返回 None"""
+        line = line.decode("utf-8").lstrip("\ufeff").rstrip("\r")
+        if not line.strip():
+            return None
+        if self.format == "jsonl":
+            try:
+                entry = json.loads(line)
+                fields = [entry["word"], entry["meaning"], entry.get("level")]
+            except (ValueError, KeyError, TypeError):
+                return None
+        else:
+            delimiter = "\t" if self.format == "tsv" else ","
+            fields = next(csv.reader([line], delimiter=delimiter)) + [None]
+            if len(fields) < 3 or (first and fields[0].strip().lower() == "word"):
+                return None
+        word, meaning, level = fields[0].strip(), fields[1].strip(), fields[2]
+        if not word or not meaning:
+            return None
+        try:
+            level = int(level)
+        except (TypeError, ValueError):
+            level = bisect_left(DIFFICULTY_LENGTHS, len(word))
+        return word, meaning, min(max(level, 0), self.levels - 1)
+
+    def build_index(self):
+        # 扫描整个文件，记录每个难度下各行的起始偏移
+        buckets = [array("Q") for _ in range(self.levels)]
+        data = self.data
+        pos, size = 0, len(data)
+        while pos < size:
+            end = data.find(b"\n", pos)
+            if end < 0:
+                end = size
+            entry = self.parse_line(data[pos:end], pos == 0)
+            if entry:
+                buckets[entry[2]].append(pos)
+            pos = end + 1
+
+        header = INDEX_MAGIC + struct.pack(f"={self.levels + 1}Q", self.levels, *map(len, buckets))
+        return header + b"".join(bucket.tobytes() for bucket in buckets)
+
+    def load_index(self, index_path):
+        # 索引同样内存映射，每个难度是一段 uint64 偏移数组
+        self.index = map_file(index_path)
+        if self.index[:8] != INDEX_MAGIC:
+            raise ValueError(f"词库索引已损坏: {index_path}")
+        levels, = struct.unpack_from("=Q", self.index, 8)
+        counts = struct.unpack_from(f"={levels}Q", self.index, 16)
+        self.offsets = memoryview(self.index)[16 + 8 * levels:].cast("Q")
+        self.buckets = []
+        start = 0
+        for count in counts:
+            self.buckets.append(self.offsets[start:start + count])
+            start += count
+
+    def count(self, level):
+        return len(self.buckets[level])
+
+    def __len__(self):
+        return sum(map(len, self.buckets))
+
+    def entry(self, level, i):
+        pos = self.buckets[level][i]
+        end = self.data.find(b"\n", pos)
+        word, meaning, _ = self.parse_line(self.data[pos:end if end >= 0 else len(self.data)])
+        return word, meaning
+
+    def sample(self, level, k, rng):
+        """随机抽取 k 个单词对；词条不够时重复使用"""
+        count = self.count(level)
+        if count >= k:
+            indices = rng.sample(range(count), k)
+        else:
+            indices = [i % count for i in range(k)]
+        return [self.entry(level, i) for i in indices]
+
+    def close(self):
+        for bucket in self.buckets:
+            bucket.release()
+        self.offsets.release()
+        self.buckets = []
+        for mapped in (self.index, self.data):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+
+_opened = {}
+
+
+def open_vocabulary(path, levels=4):
+    """同一进程内重复打开同一个词库时复用已有的索引"""
+    key = (os.path.abspath(path), levels)
+    if key not in _opened:
+        _opened[key] = Vocabulary(path, levels)
+    return _opened[key]
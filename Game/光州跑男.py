@@ -1,4 +1,5 @@
 import pygame
+import bisect
 import random
 import sys
 import time
@@ -6,13 +7,43 @@ import math
 import json
 import os
 
+from background_writer import get_writer
+from profiler import DUMP_KEY, OVERLAY_KEY, frame_profiler
+from replay import LiveInput
+from resources import ResourceManager
+
+# 障碍物池使用NumPy做批量计算，没有安装时退回逐个对象的实现
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # 常量
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 700
 GROUND_HEIGHT = 580
 PLAYER_SPEED = 0  # 玩家不能自动前进
 RUNNER_BASE_SPEED = 2
-FPS = 60
+FPS = 60  # 渲染帧率上限，0 表示不限帧率
+TICK_RATE = 60  # 模拟步频：每秒固定推进的步数，与渲染帧率无关
+TICK = 1 / TICK_RATE
+MAX_FRAME_TIME = 0.25  # 一帧最多补的模拟时间，卡顿之后不会一次追赶太多步
+CLOUD_SPEED = 0  # 云层每个模拟步向左飘动的像素（视差滚动），0 表示静止（与原来一致）
+LAYER_COLORKEY = (255, 0, 255)  # 场景图层和角色精灵中透明部分的颜色，colorkey blit 比逐像素 alpha 快
+ANIMATION_FRAMES = 24  # 每个角色的跑动动画预先渲染的相位数
+OBSTACLE_POOL_SIZE = 64  # 障碍物池预先分配的槽位数，用满时翻倍
+# 障碍物生成规则，每局复制到 Game.spawn_rules，压力测试时可以单独修改
+OBSTACLE_SPAWN_RULES = {
+    "interval": 180,  # 每隔多少个模拟步尝试生成一次
+    "count": 1,  # 每次尝试生成几个
+    "chance": 0.3,  # 每个生成的概率
+    "min_level": 3,  # 从第几级开始出现
+    "width": 30,
+    "min_height": 20,
+    "max_height": 50,
+    "speed_per_level": 2,  # 每个模拟步向左移动 等级 × speed_per_level 像素
+}
 JUMP_VELOCITY = -15
 GRAVITY = 0.8
 
@@ -32,13 +63,84 @@ BROWN = (139, 69, 19)
 LIGHT_BLUE = (173, 216, 230)
 PURPLE = (128, 0, 128)
 
+# 字体按资源清单（assets.json）登记，在线程池中加载
+resources = ResourceManager()
+resources.load_manifest("runner")
+
 class GameState:
     PLAYING = 1
     PAUSED = 2
     GAME_OVER = 3
     VICTORY = 4
 
-class Player:
+class Interpolated:
+    """按固定步长移动的物体：记录上一步的位置，绘制时在两步之间插值"""
+
+    def snapshot(self):
+        self.prev_x, self.prev_y = self.x, self.y
+
+    def position(self, alpha):
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def sync_rect(self):
+        # 碰撞用的矩形只创建一次，每步原地更新（与 pygame.Rect(x, y, w, h) 一样截断小数）
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+def keyed_surface(size):
+    """一张以 LAYER_COLORKEY 为透明色的空白表面，用来预先渲染场景图层和角色精灵"""
+    surface = pygame.Surface(size)
+    surface.fill(LAYER_COLORKEY)
+    surface.set_colorkey(LAYER_COLORKEY)
+    return surface
+
+class AnimationClock:
+    """跑动动画的相位（弧度）：每个模拟步前进 rate，绘制时取两步之间插值后的相位"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.phase = 0.0
+
+    def advance(self):
+        self.phase += self.rate
+
+    def at(self, alpha=1.0):
+        return self.phase - self.rate * (1 - alpha)
+
+class SpriteSheet:
+    """一个角色的跑动动画：把一个周期（2π）内 frames 个相位的姿势各画一次，
+    绘制时按相位取最近的一帧，每个角色每帧只 blit 一次"""
+
+    def __init__(self, draw_pose, bounds, frames=ANIMATION_FRAMES):
+        self.bounds = bounds  # 精灵相对于角色 (x, y) 的范围，要包括头部和摆动的四肢
+        self.frames = []
+        for i in range(frames):
+            surface = keyed_surface(bounds.size)
+            draw_pose(surface, -bounds.x, -bounds.y, 2 * math.pi * i / frames)
+            surface = surface.convert()
+            surface.set_colorkey(LAYER_COLORKEY, pygame.RLEACCEL)
+            self.frames.append(surface)
+
+    def frame(self, phase):
+        return self.frames[round(phase / (2 * math.pi) * len(self.frames)) % len(self.frames)]
+
+    def draw(self, screen, x, y, phase):
+        screen.blit(self.frame(phase), (x + self.bounds.x, y + self.bounds.y))
+
+# (角色类, 颜色) -> SpriteSheet，第一次用到时生成（需要先创建窗口）
+sprite_sheets = {}
+
+def get_sprite_sheet(actor):
+    key = (type(actor).__name__, getattr(actor, "color", None))
+    sheet = sprite_sheets.get(key)
+    if sheet is None:
+        sheet = sprite_sheets[key] = SpriteSheet(actor.draw_pose, actor.sprite_bounds)
+    return sheet
+
+class Player(Interpolated):
+    sprite_bounds = pygame.Rect(-13, -42, 88, 190)  # 头部在身体上方，手臂和腿向外摆动
+
     def __init__(self):
         self.x = 100
         self.y = GROUND_HEIGHT - 100
@@ -47,38 +149,44 @@ class Player:
         self.speed = PLAYER_SPEED
         self.jumping = False
         self.jump_velocity = 0
-        self.run_animation = 0
+        self.animation = AnimationClock(0.3)
         self.direction = 1
+        self.snapshot()
+        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
+        x, y = self.position(alpha)
+        get_sprite_sheet(self).draw(screen, x, y, self.animation.at(alpha))
+
+    def draw_pose(self, screen, x, y, phase):
         # 身体
-        pygame.draw.rect(screen, BLUE, (self.x, self.y, self.width, self.height))
+        pygame.draw.rect(screen, BLUE, (x, y, self.width, self.height))
         
         # 头部
-        pygame.draw.circle(screen, SKIN, (self.x + self.width // 2, self.y - 20), 20)
+        pygame.draw.circle(screen, SKIN, (x + self.width // 2, y - 20), 20)
         
         # 眼睛
-        pygame.draw.circle(screen, BLACK, (self.x + self.width // 2 - 7, self.y - 25), 3)
-        pygame.draw.circle(screen, BLACK, (self.x + self.width // 2 + 7, self.y - 25), 3)
+        pygame.draw.circle(screen, BLACK, (x + self.width // 2 - 7, y - 25), 3)
+        pygame.draw.circle(screen, BLACK, (x + self.width // 2 + 7, y - 25), 3)
         
         # 嘴巴
-        pygame.draw.arc(screen, BLACK, (self.x + self.width // 2 - 10, self.y - 15, 20, 15), 0, math.pi, 2)
+        pygame.draw.arc(screen, BLACK, (x + self.width // 2 - 10, y - 15, 20, 15), 0, math.pi, 2)
         
         # 手臂
-        hand_offset = 10 * math.sin(self.run_animation)
-        self.draw_limb(screen, (self.x + 5, self.y + 30), (self.x - 10, self.y + 40 + hand_offset), SKIN, 4)
-        self.draw_limb(screen, (self.x + self.width - 5, self.y + 30), (self.x + self.width + 10, self.y + 40 - hand_offset), SKIN, 4)
+        hand_offset = 10 * math.sin(phase)
+        self.draw_limb(screen, (x + 5, y + 30), (x - 10, y + 40 + hand_offset), SKIN, 4)
+        self.draw_limb(screen, (x + self.width - 5, y + 30), (x + self.width + 10, y + 40 - hand_offset), SKIN, 4)
         
         # 腿部
-        leg_offset = 15 * math.sin(self.run_animation)
-        self.draw_limb(screen, (self.x + 15, self.y + self.height), (self.x + 15, self.y + self.height + 30 + leg_offset), BLACK, 4)
-        self.draw_limb(screen, (self.x + 45, self.y + self.height), (self.x + 45, self.y + self.height + 30 - leg_offset), BLACK, 4)
+        leg_offset = 15 * math.sin(phase)
+        self.draw_limb(screen, (x + 15, y + self.height), (x + 15, y + self.height + 30 + leg_offset), BLACK, 4)
+        self.draw_limb(screen, (x + 45, y + self.height), (x + 45, y + self.height + 30 - leg_offset), BLACK, 4)
 
     def draw_limb(self, screen, start_pos, end_pos, color, thickness):
         pygame.draw.line(screen, color, start_pos, end_pos, thickness)
 
     def update(self, delta_time):
-        self.run_animation += 0.3
+        self.animation.advance()
         
         # 玩家不能自动前进，只能通过打字前进
         
@@ -98,7 +206,9 @@ class Player:
             self.jumping = True
             self.jump_velocity = JUMP_VELOCITY
 
-class Runner:
+class Runner(Interpolated):
+    sprite_bounds = pygame.Rect(-2, -35, 54, 164)
+
     def __init__(self):
         self.x = 700
         self.y = GROUND_HEIGHT - 90
@@ -106,59 +216,384 @@ class Runner:
         self.height = 90
         self.color = ORANGE
         self.speed = RUNNER_BASE_SPEED
-        self.run_animation = 0
+        self.animation = AnimationClock(0.4)
         self.direction = 1  # 向右跑
+        self.snapshot()
+        self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
 
-    def draw(self, screen):
+    def draw(self, screen, alpha=1.0):
+        x, y = self.position(alpha)
         # 如果跑者在屏幕内才绘制
-        if -self.width <= self.x <= SCREEN_WIDTH:
-            # 身体
-            pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
-            
-            # 头部
-            pygame.draw.circle(screen, SKIN, (self.x + self.width // 2, self.y - 15), 18)
-            
-            # 眼睛
-            pygame.draw.circle(screen, BLACK, (self.x + self.width // 2 - 5, self.y - 20), 3)
-            pygame.draw.circle(screen, BLACK, (self.x + self.width // 2 + 5, self.y - 20), 3)
-            
-            # 嘴巴
-            pygame.draw.arc(screen, BLACK, (self.x + self.width // 2 - 8, self.y - 10, 16, 12), 0, math.pi, 2)
-            
-            # 腿部
-            leg_offset = 12 * math.sin(self.run_animation + 1.5)
-            self.draw_limb(screen, (self.x + 10, self.y + self.height), (self.x + 10, self.y + self.height + 25 + leg_offset), BLACK, 3)
-            self.draw_limb(screen, (self.x + 40, self.y + self.height), (self.x + 40, self.y + self.height + 25 - leg_offset), BLACK, 3)
+        if -self.width <= x <= SCREEN_WIDTH:
+            get_sprite_sheet(self).draw(screen, x, y, self.animation.at(alpha))
+
+    def draw_pose(self, screen, x, y, phase):
+        # 身体
+        pygame.draw.rect(screen, self.color, (x, y, self.width, self.height))
+        
+        # 头部
+        pygame.draw.circle(screen, SKIN, (x + self.width // 2, y - 15), 18)
+        
+        # 眼睛
+        pygame.draw.circle(screen, BLACK, (x + self.width // 2 - 5, y - 20), 3)
+        pygame.draw.circle(screen, BLACK, (x + self.width // 2 + 5, y - 20), 3)
+        
+        # 嘴巴
+        pygame.draw.arc(screen, BLACK, (x + self.width // 2 - 8, y - 10, 16, 12), 0, math.pi, 2)
+        
+        # 腿部
+        leg_offset = 12 * math.sin(phase + 1.5)
+        self.draw_limb(screen, (x + 10, y + self.height), (x + 10, y + self.height + 25 + leg_offset), BLACK, 3)
+        self.draw_limb(screen, (x + 40, y + self.height), (x + 40, y + self.height + 25 - leg_offset), BLACK, 3)
 
     def draw_limb(self, screen, start_pos, end_pos, color, thickness):
         pygame.draw.line(screen, color, start_pos, end_pos, thickness)
 
     def update(self, level):
-        self.run_animation += 0.4
+        self.animation.advance()
         self.speed = RUNNER_BASE_SPEED + math.log(max(1, level)) * 0.3
         
         # 只向右跑，可以跑出画面
         self.x += self.speed
 
-class Obstacle:
+class Obstacle(Interpolated):
     def __init__(self, x, width, height):
+        self.color = BROWN
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(x, width, height)
+
+    def reset(self, x, width, height):
+        # 对象池复用时重新设置位置和尺寸，碰撞矩形保持同一个对象
         self.x = x
         self.y = GROUND_HEIGHT - height
         self.width = width
         self.height = height
-        self.color = BROWN
+        self.snapshot()
+        self.sync_rect()
         
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
+    def draw(self, screen, alpha=1.0):
+        x, y = self.position(alpha)
+        pygame.draw.rect(screen, self.color, (x, y, self.width, self.height))
         
     def update(self, speed):
         self.x -= speed
+        self.sync_rect()
         
     def is_off_screen(self):
         return self.x + self.width < 0
 
-class Game:
+class SweepAndPrune:
+    """沿 x 轴的扫掠剪枝（broad phase）。障碍物以相同的速度一起向左移动，彼此的先后次序不变，
+    所以按滚动坐标（左边界 + 已滚动的距离）排一次序就一直有效：新障碍物二分插入，
+    区域查询和回收最左边出界的障碍物都只需二分查找，不必每步排序或遍历全部障碍物"""
+
+    def __init__(self):
+        self.scrolled = 0.0
+        self.keys = []  # 升序的滚动坐标
+        self.items = []  # 与 keys 一一对应的槽位或对象
+        self.max_width = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def scroll(self, dx):
+        self.scrolled += dx
+
+    def insert(self, item, x, width):
+        """返回 item 的滚动坐标，删除时要用到"""
+        key = x + self.scrolled
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.items.insert(i, item)
+        self.max_width = max(self.max_width, width)
+        return key
+
+    def remove(self, item, key):
+        i = bisect.bisect_left(self.keys, key)
+        while self.items[i] != item:  # 滚动坐标相同的几个物体中找到它
+            i += 1
+        del self.keys[i]
+        del self.items[i]
+
+    def query(self, left, right):
+        """x 方向上可能与 [left, right) 相交的候选，还要再做精确判定"""
+        lo = bisect.bisect_left(self.keys, left - self.max_width + self.scrolled)
+        hi = bisect.bisect_left(self.keys, right + self.scrolled)
+        return self.items[lo:hi]
+
+    def pop_before(self, x):
+        """移除并返回左边界在 x 之前的全部物体"""
+        i = bisect.bisect_left(self.keys, x + self.scrolled)
+        items = self.items[:i]
+        del self.keys[:i]
+        del self.items[:i]
+        return items
+
+# 障碍物池：预先分配的槽位，位置和尺寸存放在并列的NumPy数组中，每步整批移动；
+# 出界回收和碰撞查询通过 SweepAndPrune 只看附近的障碍物；空出的槽位放进空闲表，生成新障碍物时直接取用
+class ObstaclePool:
+    def __init__(self, capacity=OBSTACLE_POOL_SIZE):
+        self.x = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.width = np.zeros(capacity)
+        self.height = np.zeros(capacity)
+        self.key = np.zeros(capacity)  # 在 SweepAndPrune 中的滚动坐标
+        self.active = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))  # 空闲槽位，从小到大取用
+        self.sweep = SweepAndPrune()
+        self.color = BROWN
+
+    def __len__(self):
+        return len(self.sweep)
+
+    def grow(self):
+        capacity = len(self.x)
+        for name in ("x", "prev_x", "y", "width", "height", "key", "active"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self.free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def spawn(self, x, width, height):
+        if not self.free:
+            self.grow()
+        i = self.free.pop()
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = GROUND_HEIGHT - height
+        self.width[i] = width
+        self.height[i] = height
+        self.active[i] = True
+        self.key[i] = self.sweep.insert(i, x, width)
+
+    def release(self, indices):
+        self.active[indices] = False
+        self.free.extend(indices)
+
+    def update(self, speed):
+        if not self:
+            return  # 池是空的，省掉NumPy调用的固定开销
+        # 空闲槽位也一起移动，省去按掩码取子数组
+        self.x -= speed
+        self.sweep.scroll(speed)
+        # 左边界在 -max_width 之前的一定已经出界（宽度不一时，窄的会晚几步回收）
+        off_screen = self.sweep.pop_before(-self.sweep.max_width)
+        if off_screen:
+            self.release(off_screen)
+
+    def snapshot(self):
+        self.prev_x[:] = self.x
+
+    def hits(self, rect):
+        """与 rect 相交的障碍物槽位，相当于对障碍物矩形做 rect.collidelistall（判定与 colliderect 相同）"""
+        x, y, width, height = self.x, self.y, self.width, self.height
+        return [i for i in self.sweep.query(rect.left, rect.right)
+                if x[i] + width[i] > rect.left and y[i] < rect.bottom and y[i] + height[i] > rect.top]
+
+    def first_hit(self, rect):
+        """与 rect 相交的障碍物中最靠左的左边界，没有时返回 None"""
+        hits = self.hits(rect)
+        return float(min(self.x[i] for i in hits)) if hits else None
+
+    def collide(self, rect):
+        """回收与 rect 相交的障碍物，返回数量"""
+        hits = self.hits(rect)
+        for i in hits:
+            self.sweep.remove(i, self.key[i])
+        if hits:
+            self.release(hits)
+        return len(hits)
+
+    def draw(self, screen, alpha=1.0):
+        indices = np.flatnonzero(self.active)
+        xs = self.prev_x[indices] + (self.x[indices] - self.prev_x[indices]) * alpha
+        for rect in zip(xs.tolist(), self.y[indices].tolist(),
+                        self.width[indices].tolist(), self.height[indices].tolist()):
+            screen.fill(self.color, rect)
+
+# 没有NumPy时的障碍物池：逐个对象更新，碰撞矩形随对象一起复用，查询用 SweepAndPrune 和 collidelistall；
+# 空出的 Obstacle 对象留着下次生成时复用
+class ObstacleGroup:
+    def __init__(self):
+        self.sweep = SweepAndPrune()  # 按 x 排好序的 Obstacle
+        self.free = []
+
+    def __len__(self):
+        return len(self.sweep)
+
+    def spawn(self, x, width, height):
+        if self.free:
+            obstacle = self.free.pop()
+            obstacle.reset(x, width, height)
+        else:
+            obstacle = Obstacle(x, width, height)
+        obstacle.key = self.sweep.insert(obstacle, x, width)
+
+    def update(self, speed):
+        for obstacle in self.sweep.items:
+            obstacle.update(speed)
+        self.sweep.scroll(speed)
+        self.free.extend(self.sweep.pop_before(-self.sweep.max_width))
+
+    def snapshot(self):
+        for obstacle in self.sweep.items:
+            obstacle.snapshot()
+
+    def hits(self, rect):
+        candidates = self.sweep.query(rect.left, rect.right)
+        return [candidates[i] for i in rect.collidelistall([obstacle.rect for obstacle in candidates])]
+
+    def first_hit(self, rect):
+        hits = self.hits(rect)
+        return min(obstacle.x for obstacle in hits) if hits else None
+
+    def collide(self, rect):
+        hits = self.hits(rect)
+        for obstacle in hits:
+            self.sweep.remove(obstacle, obstacle.key)
+        self.free.extend(hits)
+        return len(hits)
+
+    def draw(self, screen, alpha=1.0):
+        for obstacle in self.sweep.items:
+            obstacle.draw(screen, alpha)
+
+def create_obstacles():
+    if NUMPY_AVAILABLE:
+        return ObstaclePool()
+    return ObstacleGroup()
+
+class SceneLayer:
+    """预先渲染好的一层场景。speed 为 0 的静态层每帧直接 blit；
+    其余的按 speed（每个模拟步的像素）向左滚动，同一张图块错开平铺，不重新绘制"""
+
+    def __init__(self, surface, y=0, speed=0.0):
+        self.surface = surface
+        self.y = y
+        self.speed = speed
+        self.offset = 0.0
+
+    def update(self):
+        self.offset = (self.offset + self.speed) % self.surface.get_width()
+
+    def draw(self, screen, alpha=1.0):
+        if not self.speed:
+            screen.blit(self.surface, (0, self.y))
+            return
+        width = self.surface.get_width()
+        # offset 是这一步的位置，减去还没走完的 (1 - alpha) 步得到插值位置
+        x = -int((self.offset - self.speed * (1 - alpha)) % width)
+        while x < SCREEN_WIDTH:
+            screen.blit(self.surface, (x, self.y))
+            x += width
+
+class Scene:
+    """分层场景：先用纯色填充底色区域 fill_rect（比 blit 整屏图层快），再从后往前绘制各图层。
+    build() 把相邻的静态层合并成一张表面，静态景物再多每帧也只 blit 一次"""
+
+    def __init__(self, color, fill_rect):
+        self.color = color
+        self.fill_rect = fill_rect  # 不透明图层盖住的部分不必先填底色，每帧少写一遍像素
+        self.layers = []
+
+    def add(self, layer):
+        self.layers.append(layer)
+
+    def build(self):
+        layers = []
+        run = []
+        for layer in self.layers + [None]:
+            if layer is not None and not layer.speed:
+                run.append(layer)
+                continue
+            if run:
+                layers.append(self.flatten(run))
+                run = []
+            if layer is not None:
+                layers.append(layer)
+        for layer in layers:
+            # 转换为显示格式，透明部分使用 RLE 加速的 colorkey
+            layer.surface = layer.surface.convert()
+            layer.surface.set_colorkey(LAYER_COLORKEY, pygame.RLEACCEL)
+        self.layers = layers
+        return self
+
+    def flatten(self, run):
+        if len(run) == 1:
+            return run[0]
+        top = min(layer.y for layer in run)
+        bottom = max(layer.y + layer.surface.get_height() for layer in run)
+        surface = keyed_surface((SCREEN_WIDTH, bottom - top))
+        for layer in run:
+            surface.blit(layer.surface, (0, layer.y - top))
+        return SceneLayer(surface, top)
+
+    def update(self):
+        for layer in self.layers:
+            if layer.speed:
+                layer.update()
+
+    def draw(self, screen, alpha=1.0):
+        screen.fill(self.color, self.fill_rect)
+        for layer in self.layers:
+            layer.draw(screen, alpha)
+
+class HudText:
+    """HUD 上的一行文字，绑定一个取值函数：值变化时才重新 render，否则 blit 缓存的表面。
+    value 为 None 的是静态文字，只渲染一次。anchor 指定 pos 对齐到文字的哪个位置"""
+
+    def __init__(self, font, template, color, pos, value=None, anchor="topleft"):
+        self.font = font
+        self.template = template
+        self.color = color
+        self.pos = pos
+        self.value = value
+        self.anchor = anchor
+        self.current = None
+        self.surface = None
+
+    def draw(self, screen):
+        """绘制文字，返回这次是否重新渲染了"""
+        value = self.value() if self.value else None
+        rendered = self.surface is None or value != self.current
+        if rendered:
+            self.surface = self.font.render(self.template.format(value), True, self.color)
+            self.current = value
+        screen.blit(self.surface, self.surface.get_rect(**{self.anchor: self.pos}))
+        return rendered
+
+class Hud:
+    """HUD 控件层：按顺序绘制各控件，统计每秒实际渲染和省掉的文字渲染次数"""
+
     def __init__(self):
+        self.widgets = []
+        self.rendered = 0
+        self.skipped = 0
+        self.window_start = time.perf_counter()
+        self.rates = (0.0, 0.0)  # 上一秒每秒渲染、省掉的次数
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        return widget
+
+    def draw(self, screen):
+        for widget in self.widgets:
+            if widget.draw(screen):
+                self.rendered += 1
+            else:
+                self.skipped += 1
+        now = time.perf_counter()
+        if now - self.window_start >= 1.0:
+            elapsed = now - self.window_start
+            self.rates = (self.rendered / elapsed, self.skipped / elapsed)
+            self.rendered = self.skipped = 0
+            self.window_start = now
+
+    def report(self):
+        return f"HUD text renders {self.rates[0]:.0f}/s, avoided {self.rates[1]:.0f}/s"
+
+class Game:
+    def __init__(self, now=time.time):
+        self.now = now  # 返回当前秒数的函数，录制和回放时使用输入源的时间
         # 初始化Pygame和字体模块
         pygame.init()
         pygame.font.init()
@@ -167,14 +602,19 @@ class Game:
         pygame.display.set_caption("光州跑男 Gwangju Runner - 打字追逐")
         self.clock = pygame.time.Clock()
 
-        # 使用默认字体
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
+        # 使用默认字体（重新开局时不会重复加载）
+        resources.start()
+        self.font = resources.font("large")
+        self.small_font = resources.font("small")
 
         self.player = Player()
         self.runner = Runner()
-        self.obstacles = []
+        # 开局时生成角色的精灵表（已生成的不会重复生成），之后每帧只 blit
+        get_sprite_sheet(self.player)
+        get_sprite_sheet(self.runner)
+        self.obstacles = create_obstacles()
         self.obstacle_timer = 0
+        self.spawn_rules = dict(OBSTACLE_SPAWN_RULES)
 
         self.words = {
             "easy": ["quick", "chase", "speed", "race", "word", "type", "fast", "run", "jump", "dash"],
@@ -194,6 +634,9 @@ class Game:
         # 背景元素
         self.clouds = [(random.randint(0, SCREEN_WIDTH), random.randint(50, 200), random.randint(30, 70)) for _ in range(5)]
         self.trees = [(random.randint(0, SCREEN_WIDTH), random.randint(30, 80)) for _ in range(3)]
+        self.scene = self.build_scene()
+        self.hud = self.build_hud()
+        self.hud_panel = self.build_hud_panel()
 
     def load_high_scores(self):
         try:
@@ -205,77 +648,93 @@ class Game:
     def save_high_score(self):
         self.high_scores.append(self.score)
         self.high_scores = sorted(self.high_scores, reverse=True)[:5]
-        try:
-            with open("high_scores.json", "w") as f:
-                json.dump(self.high_scores, f)
-        except:
-            pass
+        # 交给后台线程写入，磁盘慢时也不会卡住游戏循环
+        get_writer().write("high_scores.json", json.dumps(self.high_scores).encode())
 
     def select_word(self):
         difficulty = "easy" if self.level < 5 else "medium" if self.level < 10 else "hard"
         self.current_word = random.choice(self.words[difficulty])
         self.user_input = ""
-        self.start_time = time.time()
+        self.start_time = self.now()
         self.word_time_limit = max(5, 15 - (self.level - 1) * 1)
 
     def get_distance(self):
         """计算玩家和跑者的距离"""
         return max(0, self.runner.x - self.player.x)
 
-    def draw_background(self):
-        # 天空
-        self.screen.fill(LIGHT_BLUE)
+    def build_scene(self):
+        # 天空、云朵、地面和树各画一次，之后每帧只 blit 图层
+        scene = Scene(LIGHT_BLUE, (0, 0, SCREEN_WIDTH, GROUND_HEIGHT))  # 天空，地面以下由地面图层覆盖
         
-        # 云朵
+        # 云朵：滚动时超出右边的部分在左边再画一次，平铺时没有接缝
+        clouds = keyed_surface((SCREEN_WIDTH, max(cloud[1] + cloud[2] for cloud in self.clouds) + 1))
         for cloud in self.clouds:
-            pygame.draw.circle(self.screen, WHITE, (cloud[0], cloud[1]), cloud[2])
-            pygame.draw.circle(self.screen, WHITE, (cloud[0] + cloud[2]//2, cloud[1] - cloud[2]//3), cloud[2]//1.5)
-            pygame.draw.circle(self.screen, WHITE, (cloud[0] + cloud[2], cloud[1]), cloud[2])
+            for shift in ((0, -SCREEN_WIDTH) if CLOUD_SPEED else (0,)):
+                x = cloud[0] + shift
+                pygame.draw.circle(clouds, WHITE, (x, cloud[1]), cloud[2])
+                pygame.draw.circle(clouds, WHITE, (x + cloud[2]//2, cloud[1] - cloud[2]//3), cloud[2]//1.5)
+                pygame.draw.circle(clouds, WHITE, (x + cloud[2], cloud[1]), cloud[2])
+        scene.add(SceneLayer(clouds, speed=CLOUD_SPEED))
         
         # 地面
-        pygame.draw.rect(self.screen, DARK_GREEN, (0, GROUND_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_HEIGHT))
+        top = min(GROUND_HEIGHT - tree[1] - 50 for tree in self.trees)
+        ground = keyed_surface((SCREEN_WIDTH, SCREEN_HEIGHT - top))
+        pygame.draw.rect(ground, DARK_GREEN, (0, GROUND_HEIGHT - top, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_HEIGHT))
+        scene.add(SceneLayer(ground, top))
         
         # 树
+        trees = keyed_surface((SCREEN_WIDTH, SCREEN_HEIGHT - top))
         for tree in self.trees:
-            pygame.draw.rect(self.screen, BROWN, (tree[0], GROUND_HEIGHT - tree[1], 20, tree[1]))
-            pygame.draw.circle(self.screen, GREEN, (tree[0] + 10, GROUND_HEIGHT - tree[1] - 20), 30)
+            pygame.draw.rect(trees, BROWN, (tree[0], GROUND_HEIGHT - top - tree[1], 20, tree[1]))
+            pygame.draw.circle(trees, GREEN, (tree[0] + 10, GROUND_HEIGHT - top - tree[1] - 20), 30)
+        scene.add(SceneLayer(trees, top))
+        return scene.build()
+
+    def draw_background(self, alpha=1.0):
+        self.scene.draw(self.screen, alpha)
+
+    def build_hud(self):
+        # 每行文字绑定到一个值，值变化时才重新渲染（大多只在按键时变化）
+        hud = Hud()
+        hud.add(HudText(self.font, "Score: {}", BLACK, (20, 20), lambda: self.score))
+        hud.add(HudText(self.font, "Level: {}", BLACK, (20, 60), lambda: self.level))
+        hud.add(HudText(self.font, "Distance: {}", PURPLE, (SCREEN_WIDTH - 250, 20), lambda: int(self.get_distance())))
+        hud.add(HudText(self.font, "Type: {}", BLUE, (50, SCREEN_HEIGHT - 90), lambda: self.current_word))
+        hud.add(HudText(self.font, "Input: {}", RED, (50, SCREEN_HEIGHT - 50), lambda: self.user_input))
+        hud.add(HudText(self.small_font, "Type words correctly to chase! Space to jump, F1 to pause", BLACK,
+                        (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 120), anchor="midtop"))
+        # 统计数字跟在帧时间浮层下面，只在浮层打开时绘制，不计入统计
+        self.hud_stats = HudText(self.small_font, "{}", BLACK, (10, 0), hud.report)
+        return hud
+
+    def build_hud_panel(self):
+        # 底部输入面板的背景和时间条底色不会变化，预先画好，每帧 blit 一次
+        panel = pygame.Surface((SCREEN_WIDTH, 100))
+        panel.fill(GRAY)
+        pygame.draw.rect(panel, RED, (SCREEN_WIDTH - 350, 50, 300, 15))
+        return panel.convert()
 
     def draw_ui(self):
-        # 分数和等级
-        score_text = self.font.render(f"Score: {self.score}", True, BLACK)
-        level_text = self.font.render(f"Level: {self.level}", True, BLACK)
-        self.screen.blit(score_text, (20, 20))
-        self.screen.blit(level_text, (20, 60))
-
-        # 距离显示
-        distance = self.get_distance()
-        distance_text = self.font.render(f"Distance: {int(distance)}", True, PURPLE)
-        self.screen.blit(distance_text, (SCREEN_WIDTH - 250, 20))
-
-        # 输入框背景
-        pygame.draw.rect(self.screen, GRAY, (0, SCREEN_HEIGHT - 100, SCREEN_WIDTH, 100))
-        
-        # 单词和输入
-        word_text = self.font.render(f"Type: {self.current_word}", True, BLUE)
-        input_text = self.font.render(f"Input: {self.user_input}", True, RED)
-        self.screen.blit(word_text, (50, SCREEN_HEIGHT - 90))
-        self.screen.blit(input_text, (50, SCREEN_HEIGHT - 50))
+        # 输入面板（背景和时间条底色）
+        self.screen.blit(self.hud_panel, (0, SCREEN_HEIGHT - 100))
+
+        # 分数、等级、距离、单词、输入和操作提示
+        self.hud.draw(self.screen)
 
         # 时间进度条
-        elapsed = time.time() - self.start_time
+        elapsed = self.now() - self.start_time
         time_left = max(0, self.word_time_limit - elapsed)
         progress_width = (time_left / self.word_time_limit) * 300
-        pygame.draw.rect(self.screen, RED, (SCREEN_WIDTH - 350, SCREEN_HEIGHT - 50, 300, 15))
         pygame.draw.rect(self.screen, GREEN, (SCREEN_WIDTH - 350, SCREEN_HEIGHT - 50, progress_width, 15))
 
         # 等级进度条
         level_progress = min(1.0, self.score / (self.level * 100))
         pygame.draw.rect(self.screen, RED, (20, 100, 200, 10))
         pygame.draw.rect(self.screen, GREEN, (20, 100, 200 * level_progress, 10))
-        
-        # 操作提示
-        controls_text = self.small_font.render("Type words correctly to chase! Space to jump, F1 to pause", True, BLACK)
-        self.screen.blit(controls_text, (SCREEN_WIDTH // 2 - controls_text.get_width() // 2, SCREEN_HEIGHT - 120))
+
+        # 资源加载进度（还有资源没加载完时显示）
+        if not resources.ready():
+            resources.draw_progress(self.screen, pygame.Rect(SCREEN_WIDTH - 350, SCREEN_HEIGHT - 15, 300, 6), BLUE, WHITE)
 
     def handle_input(self, event):
         if event.type == pygame.KEYDOWN:
@@ -283,12 +742,11 @@ class Game:
                 if event.key == pygame.K_RETURN:
                     if self.user_input == self.current_word:
                         # 正确输入奖励 - 玩家前进，跑者后退
-                        self.player.x += 1000  # 玩家前进
-                        self.runner.x -= 300  # 跑者后退
                         self.score += 10 * self.level
                         if self.score >= self.level * 100:
                             self.level += 1
                         self.select_word()
+                        self.dash(1000, 300)
                     else:
                         # 错误输入惩罚 - 跑者前进
                         self.user_input = ""
@@ -307,52 +765,76 @@ class Game:
                     self.state = GameState.PLAYING
             elif self.state in (GameState.GAME_OVER, GameState.VICTORY):
                 if event.key == pygame.K_r:
-                    self.__init__()
+                    self.__init__(self.now)
                 elif event.key == pygame.K_q:
-                    pygame.quit()
-                    sys.exit()
+                    self.running = False
+
+    def dash(self, player_distance, runner_distance):
+        """玩家一下子前进 player_distance，跑者后退 runner_distance。
+        连续碰撞检测：检查玩家扫过的区域，停在路上第一个障碍物前面，不会穿过去，
+        随后障碍物移过来时照常判定碰撞"""
+        player = self.player
+        start = player.sync_rect()
+        target = max(0, min(SCREEN_WIDTH - player.width, player.x + player_distance))
+        ahead = pygame.Rect(start.right, start.y, max(0, target - player.x), start.height)
+        obstacle_x = self.obstacles.first_hit(ahead)
+        if obstacle_x is not None:
+            target = max(player.x, min(target, obstacle_x - player.width))
+        player.x = target
+        self.runner.x -= runner_distance
+
+    def end_game(self, state):
+        self.state = state
+        self.save_high_score()
+
+    def update_obstacles(self):
+        rules = self.spawn_rules
+        # 更新障碍物，出界的回收到池中
+        self.obstacles.update(self.level * rules["speed_per_level"])
+        
+        # 生成新障碍物
+        self.obstacle_timer += 1
+        if self.obstacle_timer > rules["interval"]:
+            for _ in range(rules["count"]):
+                if random.random() < rules["chance"] and self.level >= rules["min_level"]:
+                    self.obstacles.spawn(SCREEN_WIDTH, rules["width"],
+                                         random.randint(rules["min_height"], rules["max_height"]))
+            self.obstacle_timer = 0
+
+    def snapshot(self):
+        # 每个模拟步开始前记录位置，绘制时在上一步和这一步之间插值
+        self.player.snapshot()
+        self.runner.snapshot()
+        self.obstacles.snapshot()
 
     def update(self):
+        """推进一个固定的模拟步（TICK 秒），速度、重力和障碍物计时都以步为单位"""
         if self.state == GameState.PLAYING:
+            self.scene.update()  # 暂停和结束画面上云层不动
             self.player.update(1)
             self.runner.update(self.level)
             
-            # 更新障碍物
-            for obstacle in self.obstacles[:]:
-                obstacle.update(self.level * 2)
-                if obstacle.is_off_screen():
-                    self.obstacles.remove(obstacle)
-            
-            # 生成新障碍物
-            self.obstacle_timer += 1
-            if self.obstacle_timer > 180:
-                if random.random() < 0.3 and self.level >= 3:
-                    self.obstacles.append(Obstacle(SCREEN_WIDTH, 30, random.randint(20, 50)))
-                self.obstacle_timer = 0
+            self.update_obstacles()
             
             # 检查单词时间限制
-            if time.time() - self.start_time > self.word_time_limit:
+            if self.now() - self.start_time > self.word_time_limit:
                 self.select_word()
             
             # 碰撞检测
-            player_rect = pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height)
-            runner_rect = pygame.Rect(self.runner.x, self.runner.y, self.runner.width, self.runner.height)
+            player_rect = self.player.sync_rect()
+            runner_rect = self.runner.sync_rect()
             
             # 检查与障碍物的碰撞
-            for obstacle in self.obstacles:
-                obstacle_rect = pygame.Rect(obstacle.x, obstacle.y, obstacle.width, obstacle.height)
-                if player_rect.colliderect(obstacle_rect):
-                    self.player.x -= 20
-                    self.score = max(0, self.score - 5)
-                    self.obstacles.remove(obstacle)
+            hits = self.obstacles.collide(player_rect)
+            if hits:
+                self.player.x -= 20 * hits
+                self.score = max(0, self.score - 5 * hits)
             
             # 检查与跑者的碰撞
             if player_rect.colliderect(runner_rect):
-                self.state = GameState.VICTORY
-                self.save_high_score()
+                self.end_game(GameState.VICTORY)
             elif self.runner.x > SCREEN_WIDTH + 5000:  # 跑者跑出画面一定距离
-                self.state = GameState.GAME_OVER
-                self.save_high_score()
+                self.end_game(GameState.GAME_OVER)
 
     def draw_game_over(self):
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -391,33 +873,72 @@ class Game:
         self.screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
         self.screen.blit(resume_text, (SCREEN_WIDTH // 2 - resume_text.get_width() // 2, SCREEN_HEIGHT // 2 + 10))
 
-    def run(self):
-        while True:
-            for event in pygame.event.get():
+    def run(self, source, fps=FPS):
+        # source 提供事件、时间和帧间等待（见 replay.py）
+        # 模拟按固定步长推进，与渲染解耦：渲染帧率 fps 可以低于或高于 TICK_RATE，0 表示不限帧率
+        self.running = True
+        previous = source.clock()
+        accumulator = 0.0
+        while self.running:
+            for event in source.poll():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                self.handle_input(event)
-
-            self.update()
-            self.draw_background()
+                    self.running = False
+                elif event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                    frame_profiler.toggle()
+                elif event.type == pygame.KEYDOWN and event.key == DUMP_KEY and frame_profiler.enabled:
+                    print(f"Frame profile saved to {frame_profiler.dump()}")
+                else:
+                    self.handle_input(event)
+
+            # 累计经过的时间，按 TICK 推进若干步，剩下不足一步的部分用来插值
+            now = source.clock()
+            accumulator += min(max(0.0, now - previous), MAX_FRAME_TIME)  # 系统时间回拨时不倒退
+            previous = now
+            with frame_profiler.span("update"):
+                while accumulator >= TICK:
+                    self.snapshot()
+                    self.update()
+                    accumulator -= TICK
+            alpha = accumulator / TICK
+
+            with frame_profiler.span("background"):
+                self.draw_background(alpha)
             
             # 绘制障碍物
-            for obstacle in self.obstacles:
-                obstacle.draw(self.screen)
-                
-            self.player.draw(self.screen)
-            self.runner.draw(self.screen)
-            self.draw_ui()
+            with frame_profiler.span("sprites"):
+                self.obstacles.draw(self.screen, alpha)
+                    
+                self.player.draw(self.screen, alpha)
+                self.runner.draw(self.screen, alpha)
             
-            if self.state in (GameState.GAME_OVER, GameState.VICTORY):
-                self.draw_game_over()
-            elif self.state == GameState.PAUSED:
-                self.draw_pause()
-
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            with frame_profiler.span("ui"):
+                self.draw_ui()
+                
+                if self.state in (GameState.GAME_OVER, GameState.VICTORY):
+                    self.draw_game_over()
+                elif self.state == GameState.PAUSED:
+                    self.draw_pause()
+
+            overlay_rect = frame_profiler.draw(self.screen, (10, 120))
+            if overlay_rect:
+                self.hud_stats.pos = (10, overlay_rect.bottom + 4)
+                self.hud_stats.draw(self.screen)
+            with frame_profiler.span("flip"):
+                pygame.display.flip()
+            frame_profiler.end_frame()
+            source.tick(self.clock, fps)
+
+# 录制输入时一并保存的存档，回放时恢复（见 replay.py）
+TRACE_FILES = ["high_scores.json"]
+
+def play(source):
+    """运行游戏直到退出，返回游戏对象"""
+    game = Game(now=source.clock)
+    game.run(source)
+    return game
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    play(LiveInput())
+    get_writer().close()  # 等待最高分写完
+    pygame.quit()
+    sys.exit()
\ No newline at end of file
@@ -2,13 +2,22 @@ import pygame
 import random
 import sys
 import time
-import json
 import os
-from pygame import mixer
+from collections import OrderedDict
+from background_writer import get_writer
+from leaderboard_store import LeaderboardStore
+from profiler import DUMP_KEY, OVERLAY_KEY, frame_profiler
+from replay import LiveInput
+from resources import ResourceManager
+from scheduler import SRS_DIR, Scheduler
+from vocabulary import open_vocabulary
 
-# 初始化pygame
-pygame.init()
-mixer.init()
+# 粒子系统使用NumPy做批量计算，没有安装时退回逐个粒子的实现
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 # 游戏常量
 SCREEN_WIDTH = 1000
@@ -16,6 +25,7 @@ SCREEN_HEIGHT = 700
 CARD_WIDTH = 120
 CARD_HEIGHT = 140
 MARGIN = 15
+BOARD_TOP = 150  # 卡片区域的顶部，上方是标题、信息和时间条
 BACKGROUND_COLOR = (30, 30, 40)
 CARD_BACK_COLOR = (60, 60, 70)
 CARD_FRONT_COLOR = (240, 240, 240)
@@ -24,6 +34,24 @@ SUCCESS_COLOR = (100, 180, 100)
 TEXT_COLOR = (30, 30, 40)
 BUTTON_COLOR = (80, 80, 90)
 BUTTON_HOVER_COLOR = (120, 120, 130)
+GRADIENT_TOP_COLOR = (30, 30, 30)  # 渐变背景顶部颜色
+GRADIENT_BOTTOM_COLOR = (100, 100, 100)  # 渐变背景底部颜色
+TEXT_CACHE_SIZE = 512  # 文字表面缓存的最大条目数
+DIRTY_RECT_RENDERING = True  # False 时每帧整屏重绘并 flip
+MAX_CLIP_PASSES = 4  # 脏区域不超过这个数量时逐个区域重绘，否则合并后重绘一次
+LOADING_BAR_RECT = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT - 16, 300, 6)  # 菜单底部的资源加载进度条
+HUD_RECT = pygame.Rect(0, 75, SCREEN_WIDTH, 65)  # 移动次数、时间条和剩余时间所在区域
+GAME_OVER_STATS_RECT = pygame.Rect(0, 315, SCREEN_WIDTH, 40)  # 结算界面的用时统计
+FLIP_STEP = 15  # 翻牌动画每帧转过的角度
+FLIP_FRAME_STRIPS = True  # 为每种卡面预先生成整条翻牌动画帧，False 时每帧即时缩放
+PARTICLE_COUNT = 100
+PARTICLE_VARIANTS = 48  # 预渲染粒子精灵的种类数
+VOCABULARY_FILE = None  # 外部词库（CSV/TSV/JSONL，见 vocabulary.py），None 时使用内置的 WORD_DATABASE
+SPACED_REPETITION = True  # 按间隔重复调度选词（见 scheduler.py），False 时每局随机选词
+LEARNER_NAME = "default"  # 学习记录保存在 learners/<LEARNER_NAME>.srs.log
+MUTED = False  # 静音运行：不初始化音频设备，不加载音效（也可以用 --muted 参数）
+# 录制输入时一并保存的存档，回放时恢复（见 replay.py）
+TRACE_FILES = [os.path.join(SRS_DIR, f"{LEARNER_NAME}.srs.log"), "leaderboard.log"]
 
 # 关卡配置
 LEVELS = [
@@ -56,31 +84,128 @@ WORD_DATABASE = [
      ("magnanimous", "宽宏大量的"), ("nefarious", "邪恶的"), ("obfuscate", "使困惑"), ("paradigm", "范例")]
 ]
 
-# 创建屏幕
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("单词闪卡记忆游戏 - 高级版")
+# 屏幕在 init_display() 中创建，导入本模块不会打开窗口，
+# 因此规则部分（FlashcardEngine）可以在无头模式下运行
+screen = None
 
-# 加载字体
-try:
-    title_font = pygame.font.Font("simhei.ttf", 48)
-    header_font = pygame.font.Font("simhei.ttf", 36)
-    normal_font = pygame.font.Font("simhei.ttf", 24)
-    small_font = pygame.font.Font("simhei.ttf", 20)
-except:
-    title_font = pygame.font.SysFont('simhei', 48)
-    header_font = pygame.font.SysFont('simhei', 36)
-    normal_font = pygame.font.SysFont('simhei', 24)
-    small_font = pygame.font.SysFont('simhei', 20)
-
-# 尝试加载音效
-try:
-    flip_sound = mixer.Sound("flip.wav")
-    match_sound = mixer.Sound("match.wav")
-    win_sound = mixer.Sound("win.wav")
-    has_sound = True
-except:
-    has_sound = False
-    print("音效文件未找到，游戏将以静音模式运行")
+# 字体和音效按资源清单（assets.json）登记，init_display() 之后在线程池中加载
+resources = ResourceManager()
+resources.load_manifest("flashcard")
+
+def report_loading(done, total, name):
+    # 在加载线程中调用，全部加载完时报告耗时
+    if done == total:
+        print(f"启动耗时: 资源全部就绪，{resources.report()}")
+
+def init_display(muted=MUTED):
+    global screen
+    
+    # 只初始化显示和字体模块，音频在加载音效时才初始化，静音时不初始化
+    pygame.display.init()
+    pygame.font.init()
+    
+    # 创建屏幕
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("单词闪卡记忆游戏 - 高级版")
+    
+    # 菜单先画出来，字体和音效在后台加载
+    resources.start(muted, on_progress=report_loading)
+
+# 文字表面缓存（LRU），避免每帧对不变的文字重复调用 font.render
+class TextCache:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)  # 淘汰最久未使用的条目
+        return surface
+    
+    def clear(self):
+        self.surfaces.clear()
+    
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+text_cache = TextCache()
+
+# 脏矩形记录：各元素报告自己变化的区域，主循环只重绘和提交这些区域
+class DirtyTracker:
+    def __init__(self):
+        self.rects = []
+        self.full = True  # 第一帧整屏绘制
+    
+    def mark(self, rect):
+        if not self.full:
+            self.rects.append(pygame.Rect(rect))
+    
+    def mark_all(self):
+        self.full = True
+        self.rects = []
+    
+    def collect(self, screen_rect):
+        # 取出本帧需要更新的区域并清空记录
+        if self.full:
+            rects = [screen_rect.copy()]
+        else:
+            rects = [rect.clip(screen_rect) for rect in self.rects]
+            rects = [rect for rect in rects if rect.width and rect.height]
+        self.full = False
+        self.rects = []
+        return rects
+
+dirty_regions = DirtyTracker()
+
+# 渐变背景缓存：只在分辨率或配色变化时重新生成
+class GradientBackground:
+    def __init__(self, top_color=GRADIENT_TOP_COLOR, bottom_color=GRADIENT_BOTTOM_COLOR):
+        self.top_color = top_color
+        self.bottom_color = bottom_color
+        self.surface = None
+        self.key = None  # (尺寸, 顶部颜色, 底部颜色)，变化时缓存失效
+        self.rebuild_count = 0
+    
+    def set_palette(self, top_color, bottom_color):
+        self.top_color = top_color
+        self.bottom_color = bottom_color
+    
+    def build(self, size):
+        width, height = size
+        surface = pygame.Surface(size)
+        for y in range(height):
+            ratio = y / height
+            color = tuple(int(top + ratio * (bottom - top))
+                          for top, bottom in zip(self.top_color, self.bottom_color))
+            pygame.draw.line(surface, color, (0, y), (width, y))
+        # 转换为显示格式，之后每帧blit最快
+        return surface.convert()
+    
+    def draw(self, surface):
+        key = (surface.get_size(), self.top_color, self.bottom_color)
+        if key != self.key:
+            self.surface = self.build(key[0])
+            self.key = key
+            self.rebuild_count += 1
+        surface.blit(self.surface, (0, 0))
 
 # 粒子效果类
 class Particle:
@@ -109,20 +234,234 @@ class Particle:
         pygame.draw.circle(s, (*self.color, self.alpha), (self.radius, self.radius), self.radius)
         surface.blit(s, (self.x, self.y))
 
-class Card:
-    def __init__(self, word_pair, index, level):
+# 粒子精灵缓存，键为 (半径, 颜色, 透明度)
+particle_sprite_cache = {}
+
+def get_particle_sprite(radius, color, alpha):
+    key = (radius, color, alpha)
+    sprite = particle_sprite_cache.get(key)
+    if sprite is None:
+        sprite = pygame.Surface((int(radius * 2), int(radius * 2)), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+        particle_sprite_cache[key] = sprite
+    return sprite
+
+# 批量粒子系统：所有粒子的数据存放在NumPy数组中，一次性更新
+class ParticleSystem:
+    def __init__(self, count, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, seed=None):
+        self.count = count
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        
+        # 预先生成有限种精灵，粒子只记录自己使用哪一种
+        variant_radii = np.round(self.rng.uniform(1, 3, PARTICLE_VARIANTS) * 2) / 2
+        variant_colors = self.rng.integers(200, 256, (PARTICLE_VARIANTS, 3))
+        variant_alphas = self.rng.integers(20, 61, PARTICLE_VARIANTS)
+        self.sprites = [get_particle_sprite(float(r), tuple(int(c) for c in color), int(a))
+                        for r, color, a in zip(variant_radii, variant_colors, variant_alphas)]
+        
+        self.positions = np.zeros((count, 2))
+        self.velocities = np.zeros((count, 2))
+        self.variants = np.zeros(count, dtype=np.intp)
+        self.reset(np.arange(count))
+    
+    def reset(self, indices):
+        n = len(indices)
+        self.positions[indices, 0] = self.rng.uniform(0, self.width, n)
+        self.positions[indices, 1] = self.rng.uniform(0, self.height, n)
+        self.velocities[indices] = self.rng.uniform(-0.5, 0.5, (n, 2))
+        self.variants[indices] = self.rng.integers(0, PARTICLE_VARIANTS, n)
+    
+    def update(self):
+        self.positions += self.velocities
+        
+        # 移出屏幕的粒子统一重置
+        x = self.positions[:, 0]
+        y = self.positions[:, 1]
+        out = (x < -10) | (x > self.width + 10) | (y < -10) | (y > self.height + 10)
+        if out.any():
+            self.reset(np.flatnonzero(out))
+    
+    def draw(self, surface):
+        sprites = self.sprites
+        positions = self.positions.astype(np.int32).tolist()
+        surface.blits([(sprites[v], pos) for v, pos in zip(self.variants.tolist(), positions)], False)
+
+# 没有NumPy时使用的粒子组，接口与ParticleSystem相同
+class ParticleGroup:
+    def __init__(self, count):
+        self.particles = [Particle() for _ in range(count)]
+    
+    def update(self):
+        for particle in self.particles:
+            particle.update()
+    
+    def draw(self, surface):
+        for particle in self.particles:
+            particle.draw(surface)
+
+def create_particles(count=PARTICLE_COUNT, seed=None):
+    if NUMPY_AVAILABLE:
+        return ParticleSystem(count, seed=seed)
+    return ParticleGroup(count)
+
+# 卡片布局表：每种网格和窗口尺寸只计算一次所有卡片的位置
+class BoardLayout:
+    def __init__(self, rows, cols, screen_size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.rows = rows
+        self.cols = cols
+        self.screen_size = screen_size
+        screen_width, screen_height = screen_size
+        area_height = screen_height - BOARD_TOP
+        
+        # 网格放不下时整体等比缩小
+        total_width = cols * CARD_WIDTH + (cols - 1) * MARGIN
+        total_height = rows * CARD_HEIGHT + (rows - 1) * MARGIN
+        scale = min(1.0, screen_width / total_width, area_height / total_height)
+        
+        self.card_width = max(1, int(CARD_WIDTH * scale))
+        self.card_height = max(1, int(CARD_HEIGHT * scale))
+        self.margin = int(MARGIN * scale)
+        self.pitch_x = self.card_width + self.margin
+        self.pitch_y = self.card_height + self.margin
+        
+        total_width = cols * self.card_width + (cols - 1) * self.margin
+        total_height = rows * self.card_height + (rows - 1) * self.margin
+        self.start_x = (screen_width - total_width) // 2
+        self.start_y = BOARD_TOP + (area_height - total_height) // 2
+        
+        self.rects = [pygame.Rect(self.start_x + (i % cols) * self.pitch_x,
+                                  self.start_y + (i // cols) * self.pitch_y,
+                                  self.card_width, self.card_height)
+                      for i in range(rows * cols)]
+    
+    def __len__(self):
+        return len(self.rects)
+    
+    def hit_test(self, pos):
+        # 返回点击位置的卡片序号，没有点中卡片时返回None；规则网格可以直接用除法定位卡片
+        x = pos[0] - self.start_x
+        y = pos[1] - self.start_y
+        if x < 0 or y < 0:
+            return None
+        col, offset_x = divmod(x, self.pitch_x)
+        row, offset_y = divmod(y, self.pitch_y)
+        # 点在卡片之间的间隙里
+        if col >= self.cols or row >= self.rows or offset_x >= self.card_width or offset_y >= self.card_height:
+            return None
+        return int(row * self.cols + col)
+
+board_layouts = {}
+
+def get_board_layout(rows, cols, screen_size):
+    key = (rows, cols, tuple(screen_size))
+    layout = board_layouts.get(key)
+    if layout is None:
+        layout = board_layouts[key] = BoardLayout(rows, cols, key[2])
+    return layout
+
+# 翻牌动画每一步的横向缩放比例，与 Vector2(1, 1).rotate 的计算结果一致
+FLIP_SCALES = [abs(pygame.math.Vector2(1, 1).rotate(angle if angle < 90 else 180 - angle).x)
+               for angle in range(0, 180, FLIP_STEP)]
+
+# 卡面缓存：每种卡面只绘制一次，翻牌动画由缓存的卡面横向缩放得到
+class CardFaces:
+    def __init__(self):
+        self.faces = {}
+        self.strips = {}
+    
+    def clear(self):
+        self.faces.clear()
+        self.strips.clear()
+    
+    def face(self, kind, size, word_pair):
+        # kind: back、front、matched，以及不显示文字的 front_blank、matched_blank
+        key = (kind, size, word_pair if kind in ("front", "matched") else None)
+        surface = self.faces.get(key)
+        if surface is None:
+            surface = self.faces[key] = self.render_face(kind, size, word_pair)
+        return surface
+    
+    def render_face(self, kind, size, word_pair):
+        width, height = size
+        texts = []
+        if kind == "back":
+            texts.append((text_cache.render(resources.font("header"), "?", (220, 220, 220)), 0))
+        elif kind in ("front", "matched"):
+            texts.append((text_cache.render(resources.font("normal"), word_pair[0], TEXT_COLOR), -15))
+            texts.append((text_cache.render(resources.font("normal"), word_pair[1], TEXT_COLOR), 15))
+        
+        # 长单词会超出卡片，表面要足够宽以容纳文字
+        face_width = max([width] + [text.get_width() for text, _ in texts])
+        surface = pygame.Surface((face_width, height), pygame.SRCALPHA)
+        card_rect = pygame.Rect((face_width - width) // 2, 0, width, height)
+        
+        if kind == "back":
+            color = CARD_BACK_COLOR
+        elif kind.startswith("matched"):
+            color = SUCCESS_COLOR
+        else:
+            color = CARD_FRONT_COLOR
+        pygame.draw.rect(surface, color, card_rect, border_radius=10)
+        pygame.draw.rect(surface, ACCENT_COLOR, card_rect, 2, border_radius=10)
+        
+        for text, offset_y in texts:
+            surface.blit(text, text.get_rect(center=(card_rect.centerx, card_rect.centery + offset_y)))
+        return surface.convert_alpha()
+    
+    def scaled_frame(self, kind, size, word_pair, step):
+        scale = FLIP_SCALES[step]
+        if int(size[0] * scale) <= 0:
+            return None
+        # 当卡片足够宽时才显示文字
+        if kind != "back" and size[0] * scale <= size[0] * 0.7:
+            kind += "_blank"
+        face = self.face(kind, size, word_pair)
+        return pygame.transform.scale(face, (max(1, int(face.get_width() * scale)), size[1]))
+    
+    def flip_frame(self, kind, size, word_pair, step):
+        # 翻牌动画第 step 帧的表面，卡片宽度为0的帧返回None
+        if not FLIP_FRAME_STRIPS:
+            return self.scaled_frame(kind, size, word_pair, step)
+        
+        key = (kind, size, word_pair if kind != "back" else None)
+        strip = self.strips.get(key)
+        if strip is None:
+            strip = self.strips[key] = [self.scaled_frame(kind, size, word_pair, i)
+                                        for i in range(len(FLIP_SCALES))]
+        return strip[step]
+
+card_faces = CardFaces()
+
+# 卡片的规则状态，无头模式下翻牌立即完成
+class CardState:
+    def __init__(self, word_pair, index):
         self.word_pair = word_pair
         self.index = index
-        self.level = level
-        self.rect = pygame.Rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
         self.matched = False
         self.face_up = False
-        self.flip_angle = 0  # 0-180度，翻牌动画
         self.flipping = False
     
+    def flip(self):
+        if not self.matched and not self.flipping:
+            self.face_up = not self.face_up
+
+class Card(CardState):
+    def __init__(self, word_pair, index, rect):
+        super().__init__(word_pair, index)
+        self.rect = rect  # 来自 BoardLayout 的位置，布局变化时由 Game 更新
+        self.flip_angle = 0  # 0-180度，翻牌动画
+    
+    def bounds(self):
+        # 卡片在屏幕上占用的区域，长单词会超出卡片两侧
+        face = card_faces.face("front", self.rect.size, self.word_pair)
+        return self.rect.inflate(max(0, face.get_width() - self.rect.width) + 2, 0)
+    
     def update(self):
         if self.flipping:
-            self.flip_angle += 15
+            dirty_regions.mark(self.bounds())
+            self.flip_angle += FLIP_STEP
             if self.flip_angle >= 180:
                 self.flip_angle = 0
                 self.face_up = not self.face_up
@@ -131,83 +470,31 @@ class Card:
     def flip(self):
         if not self.matched and not self.flipping:
             self.flipping = True
-            if has_sound:
-                flip_sound.play()
+            dirty_regions.mark(self.bounds())
+            resources.play("flip")
+    
+    def face_kind(self):
+        if self.matched:
+            return "matched" if self.face_up else "matched_blank"
+        return "front" if self.face_up else "back"
     
     def draw(self):
-        rows = LEVELS[self.level]["rows"]
-        cols = LEVELS[self.level]["cols"]
-        
-        # 计算卡片位置
-        x = self.index % cols
-        y = self.index // cols
-        
-        total_width = cols * CARD_WIDTH + (cols - 1) * MARGIN
-        total_height = rows * CARD_HEIGHT + (rows - 1) * MARGIN
-        
-        start_x = (SCREEN_WIDTH - total_width) // 2
-        start_y = 150 + (SCREEN_HEIGHT - 150 - total_height) // 2
-        
-        self.rect.x = start_x + x * (CARD_WIDTH + MARGIN)
-        self.rect.y = start_y + y * (CARD_HEIGHT + MARGIN)
-        
-        # 绘制卡片（带翻牌动画）
+        # 绘制卡片（带翻牌动画），卡面都来自预渲染的缓存
         if self.flipping:
-            # 翻牌动画
+            step = self.flip_angle // FLIP_STEP
             if self.flip_angle < 90:
                 # 前半段：显示背面
-                scale_factor = abs(pygame.math.Vector2(1, 1).rotate(self.flip_angle).x)
-                width = int(CARD_WIDTH * scale_factor)
-                if width > 0:
-                    card_rect = pygame.Rect(self.rect.centerx - width//2, self.rect.y, width, CARD_HEIGHT)
-                    pygame.draw.rect(screen, CARD_BACK_COLOR, card_rect, border_radius=10)
-                    pygame.draw.rect(screen, ACCENT_COLOR, card_rect, 2, border_radius=10)
-                    
-                    # 绘制问号
-                    question = header_font.render("?", True, (220, 220, 220))
-                    question_rect = question.get_rect(center=card_rect.center)
-                    screen.blit(question, question_rect)
+                kind = "back"
             else:
                 # 后半段：显示正面
-                scale_factor = abs(pygame.math.Vector2(1, 1).rotate(180 - self.flip_angle).x)
-                width = int(CARD_WIDTH * scale_factor)
-                if width > 0:
-                    card_rect = pygame.Rect(self.rect.centerx - width//2, self.rect.y, width, CARD_HEIGHT)
-                    color = SUCCESS_COLOR if self.matched else CARD_FRONT_COLOR
-                    pygame.draw.rect(screen, color, card_rect, border_radius=10)
-                    pygame.draw.rect(screen, ACCENT_COLOR, card_rect, 2, border_radius=10)
-                    
-                    # 绘制单词
-                    if width > CARD_WIDTH * 0.7:  # 当卡片足够宽时显示文字
-                        text_en = normal_font.render(self.word_pair[0], True, TEXT_COLOR)
-                        text_cn = normal_font.render(self.word_pair[1], True, TEXT_COLOR)
-                        
-                        text_en_rect = text_en.get_rect(center=(card_rect.centerx, card_rect.centery - 15))
-                        text_cn_rect = text_cn.get_rect(center=(card_rect.centerx, card_rect.centery + 15))
-                        
-                        screen.blit(text_en, text_en_rect)
-                        screen.blit(text_cn, text_cn_rect)
+                kind = "matched" if self.matched else "front"
+            surface = card_faces.flip_frame(kind, self.rect.size, self.word_pair, step)
         else:
             # 静态卡片
-            color = SUCCESS_COLOR if self.matched else (CARD_FRONT_COLOR if self.face_up else CARD_BACK_COLOR)
-            pygame.draw.rect(screen, color, self.rect, border_radius=10)
-            pygame.draw.rect(screen, ACCENT_COLOR, self.rect, 2, border_radius=10)
-            
-            if self.face_up:
-                # 英文单词
-                text_en = normal_font.render(self.word_pair[0], True, TEXT_COLOR)
-                text_en_rect = text_en.get_rect(center=(self.rect.centerx, self.rect.centery - 15))
-                screen.blit(text_en, text_en_rect)
-                
-                # 中文翻译
-                text_cn = normal_font.render(self.word_pair[1], True, TEXT_COLOR)
-                text_cn_rect = text_cn.get_rect(center=(self.rect.centerx, self.rect.centery + 15))
-                screen.blit(text_cn, text_cn_rect)
-            elif not self.matched:
-                # 绘制问号
-                question = header_font.render("?", True, (220, 220, 220))
-                question_rect = question.get_rect(center=self.rect.center)
-                screen.blit(question, question_rect)
+            surface = card_faces.face(self.face_kind(), self.rect.size, self.word_pair)
+        
+        if surface:
+            screen.blit(surface, (self.rect.centerx - surface.get_width() // 2, self.rect.y))
 
 class Button:
     def __init__(self, x, y, width, height, text, color=BUTTON_COLOR, hover_color=BUTTON_HOVER_COLOR):
@@ -228,12 +515,16 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=8)
         pygame.draw.rect(screen, ACCENT_COLOR, self.rect, 2, border_radius=8)
         
-        text_surf = normal_font.render(self.text, True, ACCENT_COLOR)
+        text_surf = text_cache.render(resources.font("normal"), self.text, ACCENT_COLOR)
         text_rect = text_surf.get_rect(center=self.rect.center)
         screen.blit(text_surf, text_rect)
     
     def check_hover(self, pos):
-        self.is_hovered = self.rect.collidepoint(pos)
+        hovered = bool(self.rect.collidepoint(pos))
+        if hovered != self.is_hovered:
+            # 悬停状态变化时重绘按钮和它的阴影
+            dirty_regions.mark(self.rect.inflate(0, 8))
+        self.is_hovered = hovered
         return self.is_hovered
     
     def is_clicked(self, pos, event):
@@ -241,21 +532,187 @@ class Button:
             return self.rect.collidepoint(pos)
         return False
 
-class Game:
-    def __init__(self):
+# 游戏规则（发牌、翻牌、配对、计分），不依赖屏幕，可以无头运行
+class FlashcardEngine:
+    def __init__(self, clock=time.time, rng=random, vocabulary=None, scheduler=None):
+        self.clock = clock  # 返回当前秒数的函数，模拟时可以换成虚拟时钟
+        self.rng = rng
+        self.vocabulary = vocabulary  # vocabulary.Vocabulary，按难度从外部词库抽词
+        self.scheduler = scheduler  # scheduler.Scheduler，优先选择到期需要复习的单词
+        self.mistakes = {}  # 本局每个单词对配错的次数
         self.state = "menu"  # menu, playing, game_over, leaderboard
         self.level = 0
         self.cards = []
         self.selected_cards = []
         self.moves = 0
         self.matches = 0
+        self.total_pairs = 0
         self.start_time = 0
         self.time_limit = 0
         self.remaining_time = 0
         self.score = 0
         self.player_name = ""
-        self.leaderboard = self.load_leaderboard()
-        self.particles = [Particle() for _ in range(100)]
+    
+    def deal_words(self, level, total_cards):
+        needed_pairs = total_cards // 2
+        if self.scheduler:
+            # 先复习到期的单词，不够时用新词补足
+            word_pairs = self.scheduler.due(level, needed_pairs, self.clock())
+            if len(word_pairs) < needed_pairs:
+                candidates = self.random_pairs(level, needed_pairs * 2)
+                self.rng.shuffle(candidates)
+                word_pairs += self.scheduler.prefer_new(candidates, needed_pairs - len(word_pairs), word_pairs)
+        else:
+            word_pairs = self.random_pairs(level, needed_pairs)
+        
+        # 创建卡片列表（每对单词有两张卡片）
+        word_list = []
+        for pair in word_pairs:
+            word_list.append(pair)
+            word_list.append(pair)
+        
+        # 打乱卡片顺序
+        self.rng.shuffle(word_list)
+        return word_list
+    
+    def random_pairs(self, level, needed_pairs):
+        if self.vocabulary and self.vocabulary.count(level):
+            # 外部词库只读取抽中的词条
+            return self.vocabulary.sample(level, needed_pairs, self.rng)
+        
+        # 获取当前级别的单词
+        level_words = WORD_DATABASE[level]
+        
+        # 确保有足够的单词
+        if len(level_words) < needed_pairs:
+            # 如果单词不够，重复使用一些单词
+            word_pairs = []
+            while len(word_pairs) < needed_pairs:
+                word_pairs.extend(level_words)
+            return word_pairs[:needed_pairs]
+        return self.rng.sample(level_words, needed_pairs)
+    
+    def create_card(self, word_pair, index):
+        return CardState(word_pair, index)
+    
+    def start_game(self, level, rows=None, cols=None):
+        # rows/cols 可以指定自定义网格，默认使用关卡配置
+        self.level = level
+        self.state = "playing"
+        self.selected_cards = []
+        self.moves = 0
+        self.matches = 0
+        self.score = 0
+        self.mistakes = {}
+        self.start_time = self.clock()
+        self.time_limit = LEVELS[level]["time_limit"]
+        self.remaining_time = self.time_limit
+        
+        rows = rows or LEVELS[level]["rows"]
+        cols = cols or LEVELS[level]["cols"]
+        word_list = self.deal_words(level, rows * cols)
+        self.cards = [self.create_card(word_pair, i) for i, word_pair in enumerate(word_list)]
+        self.total_pairs = len(self.cards) // 2
+    
+    def flip_card(self, card):
+        card.flip()
+    
+    def flip_back_selected(self):
+        # 翻回不匹配的卡片
+        for card in self.selected_cards:
+            self.flip_card(card)
+        self.selected_cards = []
+    
+    def select_card(self, card):
+        # 玩家点击一张卡片，返回 "flip"、"match"、"mismatch"，无效点击返回None
+        if card.matched or card.flipping or card in self.selected_cards:
+            return None
+        
+        # 如果已经选择了两张卡片，先翻回去
+        if len(self.selected_cards) == 2:
+            self.flip_back_selected()
+        
+        # 翻开卡片
+        self.flip_card(card)
+        self.selected_cards.append(card)
+        
+        # 如果选择了两张卡片，检查是否匹配
+        if len(self.selected_cards) < 2:
+            return "flip"
+        self.moves += 1
+        if self.selected_cards[0].word_pair == self.selected_cards[1].word_pair:
+            # 匹配成功
+            for c in self.selected_cards:
+                c.matched = True
+            self.matches += 1
+            matched_cards = self.selected_cards
+            self.selected_cards = []
+            if self.scheduler:
+                self.record_review(matched_cards[0].word_pair)
+            self.on_match(matched_cards)
+            return "match"
+        
+        # 不匹配，稍后翻回去
+        for c in self.selected_cards:
+            self.mistakes[c.word_pair] = self.mistakes.get(c.word_pair, 0) + 1
+        self.on_mismatch(self.selected_cards)
+        return "mismatch"
+    
+    def record_review(self, word_pair):
+        # 配错次数换算为 SM-2 的回忆质量：没配错为 5，配错 3 次及以上视为忘记
+        quality = max(2, 5 - self.mistakes.get(word_pair, 0))
+        self.scheduler.review(word_pair, self.level, quality, self.clock())
+    
+    def compute_score(self, time_used):
+        # 计算得分 (时间分数 + 移动效率分数)
+        time_bonus = max(0, self.time_limit - time_used) * 10
+        move_penalty = max(0, self.moves - self.total_pairs) * 5
+        return int(1000 + time_bonus - move_penalty)
+    
+    def update_cards(self):
+        pass
+    
+    def update(self):
+        if self.state == "playing":
+            # 更新剩余时间
+            self.remaining_time = max(0, self.time_limit - (self.clock() - self.start_time))
+            
+            # 检查时间是否用完
+            if self.remaining_time <= 0:
+                self.state = "game_over"
+                self.player_name = "玩家"  # 默认玩家名
+            
+            self.update_cards()
+            
+            # 检查是否所有卡片都已匹配
+            if self.matches == self.total_pairs:
+                self.state = "game_over"
+                self.score = self.compute_score(self.clock() - self.start_time)
+                self.on_win()
+    
+    # 以下事件由界面层覆盖，用来播放音效和动画
+    def on_match(self, cards):
+        pass
+    
+    def on_mismatch(self, cards):
+        pass
+    
+    def on_win(self):
+        pass
+
+class Game(FlashcardEngine):
+    def __init__(self, clock=time.time):
+        super().__init__(
+            clock=clock,
+            vocabulary=open_vocabulary(VOCABULARY_FILE, len(LEVELS)) if VOCABULARY_FILE else None,
+            scheduler=Scheduler(LEARNER_NAME, writer=get_writer()) if SPACED_REPETITION else None)
+        self.layout = None
+        self.animating = set()  # 正在播放翻牌动画的卡片
+        self.leaderboard = LeaderboardStore(levels=len(LEVELS), writer=get_writer())
+        self.particles = create_particles(seed=random.getrandbits(32))  # 录制回放时粒子也可重现
+        self.background = GradientBackground()
+        self.view_key = None  # 状态、关卡或窗口尺寸变化时整屏重绘
+        self.hud_key = None
         
         # 创建按钮
         button_width, button_height = 220, 50
@@ -271,115 +728,72 @@ class Game:
         self.restart_button = Button(center_x, 550, button_width, button_height, "重新开始")
     
     def draw_gradient_background(self):
-        # 绘制黑白渐变背景
-        for y in range(SCREEN_HEIGHT):
-            gray = int(30 + (y / SCREEN_HEIGHT) * 70)  # 从30到100的灰度
-            pygame.draw.line(screen, (gray, gray, gray), (0, y), (SCREEN_WIDTH, y))
+        # 绘制黑白渐变背景（使用预渲染的缓存表面）
+        self.background.draw(screen)
     
     def update_particles(self):
-        for particle in self.particles:
-            particle.update()
+        self.particles.update()
     
     def draw_particles(self):
-        for particle in self.particles:
-            particle.draw(screen)
-    
-    def load_leaderboard(self):
-        try:
-            with open("leaderboard.json", "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {str(i): [] for i in range(len(LEVELS))}
+        self.particles.draw(screen)
     
     def save_leaderboard(self):
-        with open("leaderboard.json", "w", encoding="utf-8") as f:
-            json.dump(self.leaderboard, f, ensure_ascii=False, indent=2)
+        # 导出 leaderboard.json 以兼容旧版本
+        self.leaderboard.export_json()
     
     def add_to_leaderboard(self):
-        level_key = str(self.level)
-        if level_key not in self.leaderboard:
-            self.leaderboard[level_key] = []
-        
-        # 添加新记录
-        self.leaderboard[level_key].append({
+        # 追加新记录，前10名由存储的索引维护
+        self.leaderboard.add(str(self.level), {
             "name": self.player_name,
             "score": self.score,
-            "time": int(time.time() - self.start_time),
+            "time": int(self.clock() - self.start_time),
             "moves": self.moves,
             "date": time.strftime("%Y-%m-%d %H:%M")
         })
         
-        # 排序并保留前10名
-        self.leaderboard[level_key].sort(key=lambda x: x["score"], reverse=True)
-        self.leaderboard[level_key] = self.leaderboard[level_key][:10]
-        
         self.save_leaderboard()
     
-    def start_game(self, level):
-        self.level = level
-        self.state = "playing"
-        self.cards = []
-        self.selected_cards = []
-        self.moves = 0
-        self.matches = 0
-        self.start_time = time.time()
-        self.time_limit = LEVELS[level]["time_limit"]
-        
-        # 获取当前级别的单词
-        level_words = WORD_DATABASE[level]
-        rows = LEVELS[level]["rows"]
-        cols = LEVELS[level]["cols"]
-        total_cards = rows * cols
-        
-        # 确保有足够的单词
-        if len(level_words) < total_cards // 2:
-            # 如果单词不够，重复使用一些单词
-            needed_pairs = total_cards // 2
-            word_pairs = []
-            while len(word_pairs) < needed_pairs:
-                word_pairs.extend(level_words)
-            word_pairs = word_pairs[:needed_pairs]
-        else:
-            word_pairs = random.sample(level_words, total_cards // 2)
-        
-        # 创建卡片列表（每对单词有两张卡片）
-        word_list = []
-        for pair in word_pairs:
-            word_list.append(pair)
-            word_list.append(pair)
-        
-        # 打乱卡片顺序
-        random.shuffle(word_list)
-        
-        # 创建卡片对象
-        for i, word_pair in enumerate(word_list):
-            self.cards.append(Card(word_pair, i, level))
+    def start_game(self, level, rows=None, cols=None):
+        rows = rows or LEVELS[level]["rows"]
+        cols = cols or LEVELS[level]["cols"]
+        self.layout = get_board_layout(rows, cols, screen.get_size())
+        self.animating = set()
+        card_faces.clear()
+        super().start_game(level, rows, cols)
     
-    def update(self):
-        if self.state == "playing":
-            # 更新剩余时间
-            self.remaining_time = max(0, self.time_limit - (time.time() - self.start_time))
-            
-            # 检查时间是否用完
-            if self.remaining_time <= 0:
-                self.state = "game_over"
-                self.player_name = "玩家"  # 默认玩家名
-            
-            # 更新所有卡片
+    def create_card(self, word_pair, index):
+        return Card(word_pair, index, self.layout.rects[index])
+    
+    def flip_card(self, card):
+        card.flip()
+        if card.flipping:
+            self.animating.add(card)
+    
+    def update_layout(self):
+        # 窗口尺寸变化时重新取布局表
+        if self.layout and self.layout.screen_size != screen.get_size():
+            self.layout = get_board_layout(self.layout.rows, self.layout.cols, screen.get_size())
             for card in self.cards:
-                card.update()
-            
-            # 检查是否所有卡片都已匹配
-            if all(card.matched for card in self.cards):
-                self.state = "game_over"
-                # 计算得分 (时间分数 + 移动效率分数)
-                time_used = time.time() - self.start_time
-                time_bonus = max(0, self.time_limit - time_used) * 10
-                move_penalty = max(0, self.moves - len(self.cards)//2) * 5
-                self.score = int(1000 + time_bonus - move_penalty)
-                
-                if has_sound:
-                    win_sound.play()
+                card.rect = self.layout.rects[card.index]
+    
+    def update_cards(self):
+        # 只更新正在翻转的卡片
+        for card in list(self.animating):
+            card.update()
+            if not card.flipping:
+                self.animating.discard(card)
+    
+    def on_match(self, cards):
+        for card in cards:
+            dirty_regions.mark(card.bounds())
+        resources.play("match")
+    
+    def on_mismatch(self, cards):
+        # 不匹配，1秒后翻回去
+        pygame.time.set_timer(pygame.USEREVENT, 1000, 1)
+    
+    def on_win(self):
+        resources.play("win")
     
     def handle_click(self, pos, event):
         if self.state == "menu":
@@ -389,38 +803,14 @@ class Game:
                     return
             
             if self.leaderboard_button.is_clicked(pos, event):
+                self.leaderboard.refresh()  # 读取其他会话新写入的成绩
                 self.state = "leaderboard"
         
         elif self.state == "playing":
-            for card in self.cards:
-                if card.rect.collidepoint(pos) and not card.matched and not card.flipping:
-                    # 如果已经选择了两张卡片，先翻回去
-                    if len(self.selected_cards) == 2:
-                        for c in self.selected_cards:
-                            c.flip()
-                        self.selected_cards = []
-                    
-                    # 翻开卡片
-                    card.flip()
-                    self.selected_cards.append(card)
-                    
-                    # 如果选择了两张卡片，检查是否匹配
-                    if len(self.selected_cards) == 2:
-                        self.moves += 1
-                        if self.selected_cards[0].word_pair == self.selected_cards[1].word_pair:
-                            # 匹配成功
-                            for c in self.selected_cards:
-                                c.matched = True
-                            self.matches += 1
-                            self.selected_cards = []
-                            
-                            if has_sound:
-                                match_sound.play()
-                        else:
-                            # 不匹配，稍后翻回去
-                            pygame.time.set_timer(pygame.USEREVENT, 1000, 1)
-                    
-                    break
+            # 通过布局表直接定位被点击的卡片
+            index = self.layout.hit_test(pos)
+            if index is not None and index < len(self.cards):
+                self.select_card(self.cards[index])
         
         elif self.state == "game_over":
             if self.restart_button.is_clicked(pos, event):
@@ -432,26 +822,14 @@ class Game:
         elif self.state == "leaderboard":
             if self.menu_button.is_clicked(pos, event):
                 self.state = "menu"
+            
+            # 检查选项卡点击
+            for i, tab_rect in enumerate(self.leaderboard_tab_rects()):
+                if tab_rect.collidepoint(pos):
+                    self.level = i
     
-    def draw(self):
-        # 绘制渐变背景
-        self.draw_gradient_background()
-        
-        # 绘制粒子效果
-        if self.state == "menu":
-            self.draw_particles()
-        
-        if self.state == "menu":
-            self.draw_menu()
-        elif self.state == "playing":
-            self.draw_game()
-        elif self.state == "game_over":
-            self.draw_game_over()
-        elif self.state == "leaderboard":
-            self.draw_leaderboard()
-        
-        # 绘制鼠标悬停效果
-        mouse_pos = pygame.mouse.get_pos()
+    def update_hover(self, mouse_pos):
+        # 更新按钮的鼠标悬停效果
         if self.state == "menu":
             for button in self.level_buttons:
                 button.check_hover(mouse_pos)
@@ -462,12 +840,76 @@ class Game:
         elif self.state == "leaderboard":
             self.menu_button.check_hover(mouse_pos)
     
+    def mark_dirty_regions(self):
+        view_key = (self.state, self.level, screen.get_size(), resources.ready("font"))
+        if view_key != self.view_key:
+            self.view_key = view_key
+            self.hud_key = None
+            dirty_regions.mark_all()
+        
+        if self.state == "menu":
+            # 菜单背景的粒子一直在动，整屏重绘
+            dirty_regions.mark_all()
+        elif self.state == "playing":
+            time_ratio = self.remaining_time / self.time_limit
+            hud_key = (self.moves, self.matches, int(self.remaining_time), int(400 * time_ratio))
+            if hud_key != self.hud_key:
+                self.hud_key = hud_key
+                dirty_regions.mark(HUD_RECT)
+        elif self.state == "game_over":
+            hud_key = int(self.clock() - self.start_time)
+            if hud_key != self.hud_key:
+                self.hud_key = hud_key
+                dirty_regions.mark(GAME_OVER_STATS_RECT)
+    
+    def render(self):
+        # 脏矩形渲染：只重绘变化的区域，返回需要提交到显示器的矩形列表
+        self.mark_dirty_regions()
+        rects = dirty_regions.collect(screen.get_rect())
+        if not rects:
+            return rects  # 没有变化，跳过整帧
+        
+        if len(rects) <= MAX_CLIP_PASSES:
+            clips = rects
+        else:
+            clips = [rects[0].unionall(rects[1:])]
+        for clip in clips:
+            screen.set_clip(clip)
+            self.draw()
+        screen.set_clip(None)
+        return rects
+    
+    def draw(self):
+        # 绘制渐变背景
+        with frame_profiler.span("background"):
+            self.draw_gradient_background()
+        
+        # 绘制粒子效果
+        if self.state == "menu":
+            with frame_profiler.span("particles"):
+                self.draw_particles()
+        
+        if self.state == "playing":
+            self.draw_game()  # 内部分别计时界面和卡片
+            return
+        if self.state == "menu" and not resources.ready():
+            resources.draw_progress(screen, LOADING_BAR_RECT, ACCENT_COLOR, BUTTON_COLOR)
+        if self.state == "menu" and not resources.ready("font"):
+            return  # 字体还在加载，先只画背景和进度条
+        with frame_profiler.span("ui"):
+            if self.state == "menu":
+                self.draw_menu()
+            elif self.state == "game_over":
+                self.draw_game_over()
+            elif self.state == "leaderboard":
+                self.draw_leaderboard()
+    
     def draw_menu(self):
         # 标题
-        title = title_font.render("单词闪卡记忆游戏", True, ACCENT_COLOR)
+        title = text_cache.render(resources.font("title"), "单词闪卡记忆游戏", ACCENT_COLOR)
         screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 60))
         
-        subtitle = header_font.render("选择关卡开始游戏", True, (200, 200, 200))
+        subtitle = text_cache.render(resources.font("header"), "选择关卡开始游戏", (200, 200, 200))
         screen.blit(subtitle, (SCREEN_WIDTH//2 - subtitle.get_width()//2, 130))
         
         # 绘制关卡按钮
@@ -476,8 +918,8 @@ class Game:
             button.draw()
             
             # 显示关卡信息
-            info_text = small_font.render(f"{level_info['rows']}x{level_info['cols']}卡片 | 时间限制: {level_info['time_limit']}秒", 
-                                         True, (200, 200, 200))
+            info_text = text_cache.render(resources.font("small"), f"{level_info['rows']}x{level_info['cols']}卡片 | 时间限制: {level_info['time_limit']}秒", 
+                                         (200, 200, 200))
             screen.blit(info_text, (SCREEN_WIDTH//2 - info_text.get_width()//2, button.rect.y + 55))
         
         # 绘制排行榜按钮
@@ -486,13 +928,23 @@ class Game:
         self.leaderboard_button.draw()
     
     def draw_game(self):
+        with frame_profiler.span("ui"):
+            self.draw_hud()
+        
+        # 绘制所有卡片
+        with frame_profiler.span("cards"):
+            self.update_layout()
+            for card in self.cards:
+                card.draw()
+    
+    def draw_hud(self):
         # 标题
         level_name = LEVELS[self.level]["name"]
-        title = header_font.render(f"{level_name}关卡", True, ACCENT_COLOR)
+        title = text_cache.render(resources.font("header"), f"{level_name}关卡", ACCENT_COLOR)
         screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 30))
         
         # 游戏信息
-        info_text = normal_font.render(f"移动次数: {self.moves} | 匹配对数: {self.matches}/{len(self.cards)//2}", True, (200, 200, 200))
+        info_text = text_cache.render(resources.font("normal"), f"移动次数: {self.moves} | 匹配对数: {self.matches}/{self.total_pairs}", (200, 200, 200))
         screen.blit(info_text, (SCREEN_WIDTH//2 - info_text.get_width()//2, 80))
         
         # 时间条
@@ -507,12 +959,8 @@ class Game:
             color = (100, 200, 100) if time_ratio > 0.3 else (200, 100, 100)
             pygame.draw.rect(screen, color, time_fill_rect, border_radius=10)
         
-        time_text = small_font.render(f"剩余时间: {int(self.remaining_time)}秒", True, (255, 255, 255))
+        time_text = text_cache.render(resources.font("small"), f"剩余时间: {int(self.remaining_time)}秒", (255, 255, 255))
         screen.blit(time_text, (SCREEN_WIDTH//2 - time_text.get_width()//2, 115))
-        
-        # 绘制所有卡片
-        for card in self.cards:
-            card.draw()
     
     def draw_game_over(self):
         # 半透明覆盖层
@@ -522,50 +970,47 @@ class Game:
         
         # 游戏结果
         if self.remaining_time > 0:
-            result_text = title_font.render("恭喜你完成了所有匹配！", True, SUCCESS_COLOR)
-            score_text = header_font.render(f"得分: {self.score}", True, ACCENT_COLOR)
+            result_text = text_cache.render(resources.font("title"), "恭喜你完成了所有匹配！", SUCCESS_COLOR)
+            score_text = text_cache.render(resources.font("header"), f"得分: {self.score}", ACCENT_COLOR)
         else:
-            result_text = title_font.render("时间到！游戏结束", True, (255, 100, 100))
-            score_text = header_font.render(f"匹配对数: {self.matches}/{len(self.cards)//2}", True, ACCENT_COLOR)
+            result_text = text_cache.render(resources.font("title"), "时间到！游戏结束", (255, 100, 100))
+            score_text = text_cache.render(resources.font("header"), f"匹配对数: {self.matches}/{self.total_pairs}", ACCENT_COLOR)
         
         screen.blit(result_text, (SCREEN_WIDTH//2 - result_text.get_width()//2, 200))
         screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, 270))
         
         # 统计信息
-        time_used = int(time.time() - self.start_time)
-        stats_text = normal_font.render(f"用时: {time_used}秒 | 移动次数: {self.moves}", True, (255, 255, 255))
+        time_used = int(self.clock() - self.start_time)
+        stats_text = text_cache.render(resources.font("normal"), f"用时: {time_used}秒 | 移动次数: {self.moves}", (255, 255, 255))
         screen.blit(stats_text, (SCREEN_WIDTH//2 - stats_text.get_width()//2, 320))
         
         # 按钮
         self.restart_button.draw()
         self.leaderboard_button.draw()
     
+    def leaderboard_tab_rects(self):
+        tab_width = 200
+        return [pygame.Rect(SCREEN_WIDTH//2 - (len(LEVELS)*tab_width)//2 + i*tab_width, 100, tab_width, 40)
+                for i in range(len(LEVELS))]
+    
     def draw_leaderboard(self):
         # 标题
-        title = title_font.render("排行榜", True, ACCENT_COLOR)
+        title = text_cache.render(resources.font("title"), "排行榜", ACCENT_COLOR)
         screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 30))
         
         # 选项卡（选择不同关卡）
-        tab_width = 200
-        for i, level in enumerate(LEVELS):
-            tab_rect = pygame.Rect(SCREEN_WIDTH//2 - (len(LEVELS)*tab_width)//2 + i*tab_width, 100, tab_width, 40)
+        for i, (level, tab_rect) in enumerate(zip(LEVELS, self.leaderboard_tab_rects())):
             color = ACCENT_COLOR if i == self.level else BUTTON_COLOR
             pygame.draw.rect(screen, color, tab_rect, border_radius=5)
             pygame.draw.rect(screen, (255, 255, 255), tab_rect, 2, border_radius=5)
             
-            tab_text = small_font.render(level["name"], True, (255, 255, 255))
+            tab_text = text_cache.render(resources.font("small"), level["name"], (255, 255, 255))
             screen.blit(tab_text, (tab_rect.centerx - tab_text.get_width()//2, 
                                  tab_rect.centery - tab_text.get_height()//2))
-            
-            # 检查选项卡点击
-            mouse_pos = pygame.mouse.get_pos()
-            if pygame.mouse.get_pressed()[0] and tab_rect.collidepoint(mouse_pos):
-                self.level = i
         
         # 排行榜内容
-        level_key = str(self.level)
-        if level_key in self.leaderboard and self.leaderboard[level_key]:
-            records = self.leaderboard[level_key]
+        records = self.leaderboard.top(str(self.level))
+        if records:
             
             # 表头
             headers = ["排名", "玩家", "得分", "用时", "移动", "日期"]
@@ -574,7 +1019,7 @@ class Game:
             
             for i, header in enumerate(headers):
                 x = 150 + i * 150
-                header_text = normal_font.render(header, True, ACCENT_COLOR)
+                header_text = text_cache.render(resources.font("normal"), header, ACCENT_COLOR)
                 screen.blit(header_text, (x, content_start_y - 30))
             
             # 记录
@@ -583,38 +1028,42 @@ class Game:
                 color = (255, 255, 255) if i % 2 == 0 else (200, 200, 200)
                 
                 # 排名
-                rank_text = normal_font.render(str(i+1), True, color)
+                rank_text = text_cache.render(resources.font("normal"), str(i+1), color)
                 screen.blit(rank_text, (150, y))
                 
                 # 玩家名
-                name_text = normal_font.render(record["name"], True, color)
+                name_text = text_cache.render(resources.font("normal"), record["name"], color)
                 screen.blit(name_text, (300, y))
                 
                 # 得分
-                score_text = normal_font.render(str(record["score"]), True, color)
+                score_text = text_cache.render(resources.font("normal"), str(record["score"]), color)
                 screen.blit(score_text, (450, y))
                 
                 # 用时
-                time_text = normal_font.render(f"{record['time']}秒", True, color)
+                time_text = text_cache.render(resources.font("normal"), f"{record['time']}秒", color)
                 screen.blit(time_text, (600, y))
                 
                 # 移动次数
-                moves_text = normal_font.render(str(record["moves"]), True, color)
+                moves_text = text_cache.render(resources.font("normal"), str(record["moves"]), color)
                 screen.blit(moves_text, (750, y))
                 
                 # 日期
-                date_text = small_font.render(record["date"], True, color)
+                date_text = text_cache.render(resources.font("small"), record["date"], color)
                 screen.blit(date_text, (900 - date_text.get_width(), y))
         else:
             # 无记录提示
-            no_data_text = header_font.render("暂无记录，快来挑战吧！", True, (200, 200, 200))
+            no_data_text = text_cache.render(resources.font("header"), "暂无记录，快来挑战吧！", (200, 200, 200))
             screen.blit(no_data_text, (SCREEN_WIDTH//2 - no_data_text.get_width()//2, 300))
         
         # 返回按钮
         self.menu_button.draw()
 
-def main():
-    game = Game()
+def play(source, muted=MUTED):
+    """运行游戏直到退出，source 提供事件、鼠标位置和时间（见 replay.py），返回游戏对象"""
+    started = time.perf_counter()
+    first_frame = None
+    init_display(muted)
+    game = Game(clock=source.clock)
     clock = pygame.time.Clock()
     
     # 自定义事件：翻回不匹配的卡片
@@ -622,29 +1071,59 @@ def main():
     
     running = True
     while running:
-        for event in pygame.event.get():
+        for event in source.poll():
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.USEREVENT:
                 # 翻回不匹配的卡片
                 if game.state == "playing" and len(game.selected_cards) == 2:
-                    for card in game.selected_cards:
-                        card.flip()
-                    game.selected_cards = []
+                    game.flip_back_selected()
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # 左键点击
                     game.handle_click(event.pos, event)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == OVERLAY_KEY:
+                    frame_profiler.toggle()
+                    dirty_regions.mark_all()  # 擦掉或画出浮层
+                elif event.key == DUMP_KEY and frame_profiler.enabled:
+                    print(f"帧时间统计已导出到 {frame_profiler.dump()}")
         
         # 更新粒子效果
-        game.update_particles()
+        with frame_profiler.span("particles"):
+            game.update_particles()
         
-        game.update()
-        game.draw()
-        pygame.display.flip()
-        clock.tick(60)
-    
+        with frame_profiler.span("update"):
+            game.update()
+            game.update_hover(source.mouse_pos())
+        if DIRTY_RECT_RENDERING:
+            if frame_profiler.rect:
+                dirty_regions.mark(frame_profiler.rect)  # 浮层下面的画面每帧重绘
+            rects = game.render()
+            overlay_rect = frame_profiler.draw(screen)
+            if overlay_rect:
+                rects.append(overlay_rect)
+            with frame_profiler.span("flip"):
+                if rects:
+                    pygame.display.update(rects)
+        else:
+            game.draw()
+            frame_profiler.draw(screen)
+            with frame_profiler.span("flip"):
+                pygame.display.flip()
+        frame_profiler.end_frame()
+        
+        # 报告第一帧显示出来的耗时，资源全部就绪的耗时由 report_loading 报告
+        if first_frame is None:
+            first_frame = time.perf_counter() - started
+            print(f"启动耗时: 首帧 {first_frame * 1000:.0f}ms")
+        source.tick(clock, 60)
+    return game
+
+def main():
+    play(LiveInput(), muted=MUTED or "--muted" in sys.argv)
+    get_writer().close()  # 等待排行榜写完再退出
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,187 @@
+"""
+翻牌模拟器 的帧时间对比测试。
+
+使用 SDL 的 dummy 视频驱动运行，不需要真实显示器：
+    python benchmarks/bench_flashcard.py
+
+本文件同时注册了基准套件（benchmarks/run.py）使用的单项基准。
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from harness import Bench, benchmark, enter_work_dir
+
+import pygame
+import 翻牌模拟器 as flashcard
+from background_writer import BackgroundWriter
+from leaderboard_store import LeaderboardStore
+
+flashcard.init_display()
+
+
+def time_frames(draw, frames):
+    """运行 draw 若干帧，返回平均每帧毫秒数"""
+    draw()  # 预热（包括缓存的首次生成）
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start) * 1000 / frames
+
+
+def draw_gradient_per_line():
+    # 优化前的实现：每帧逐行绘制
+    screen = flashcard.screen
+    for y in range(flashcard.SCREEN_HEIGHT):
+        gray = int(30 + (y / flashcard.SCREEN_HEIGHT) * 70)
+        pygame.draw.line(screen, (gray, gray, gray), (0, y), (flashcard.SCREEN_WIDTH, y))
+
+
+def bench_gradient(frames=300):
+    background = flashcard.GradientBackground()
+    before = time_frames(draw_gradient_per_line, frames)
+    after = time_frames(lambda: background.draw(flashcard.screen), frames)
+    return before, after
+
+
+def bench_particles(count, frames=120):
+    screen = flashcard.screen
+    group = flashcard.ParticleGroup(count)
+    
+    def step_group():
+        group.update()
+        group.draw(screen)
+    
+    before = time_frames(step_group, frames)
+    after = None
+    if flashcard.NUMPY_AVAILABLE:
+        system = flashcard.ParticleSystem(count)
+        
+        def step_system():
+            system.update()
+            system.draw(screen)
+        
+        after = time_frames(step_system, frames)
+    return before, after
+
+
+def bench_reveal_all(frames=120):
+    # 5x6 棋盘上所有卡片同时翻牌（“全部翻开”）时绘制一帧的耗时
+    game = flashcard.Game()
+    game.start_game(3)
+
+    def step():
+        for card in game.cards:
+            if not card.flipping:
+                card.flip()
+            card.update()
+            card.draw()
+
+    return time_frames(step, frames)
+
+
+@benchmark("flashcard.gradient_background", number=300)
+def setup_gradient():
+    background = flashcard.GradientBackground()
+    return lambda: background.draw(flashcard.screen)
+
+
+@benchmark("flashcard.particles", number=300)
+def setup_particles():
+    particles = flashcard.create_particles(seed=1)
+
+    def step():
+        particles.update()
+        particles.draw(flashcard.screen)
+    return step
+
+
+def deal_board(level=3):
+    game = flashcard.Game()
+    game.rng = flashcard.random.Random(1)
+    game.scheduler = None  # 固定的随机发牌，不受学习记录影响
+    game.start_game(level)
+    game.update_layout()
+    return game
+
+
+@benchmark("flashcard.card_draw", number=300)
+def setup_card_draw():
+    game = deal_board()
+
+    def step():
+        for card in game.cards:
+            card.draw()
+    return step
+
+
+@benchmark("flashcard.card_draw_flipping", number=300)
+def setup_card_draw_flipping():
+    game = deal_board()
+
+    def step():
+        for card in game.cards:
+            if not card.flipping:
+                card.flip()
+            card.update()
+            card.draw()
+    return step
+
+
+def leaderboard_record(i):
+    return {"name": "玩家", "score": 1000 + i % 500, "time": 60, "moves": 20, "date": "2024-01-01 00:00"}
+
+
+@benchmark("flashcard.leaderboard_save", number=50)
+def setup_leaderboard_save():
+    # 同步写入：追加一条成绩并导出 leaderboard.json
+    directory = tempfile.mkdtemp()
+    store = LeaderboardStore(os.path.join(directory, "leaderboard.log"), os.path.join(directory, "leaderboard.json"))
+    count = iter(range(10 ** 9))
+
+    def step():
+        store.add("0", leaderboard_record(next(count)))
+        store.export_json()
+    return Bench(step, teardown=lambda: shutil.rmtree(directory, ignore_errors=True))
+
+
+@benchmark("flashcard.leaderboard_save_async", number=50)
+def setup_leaderboard_save_async():
+    # 使用后台写入线程时游戏循环中的耗时；每轮结束时等待写完，写入线程的耗时记为 flush_ms
+    directory = tempfile.mkdtemp()
+    writer = BackgroundWriter()
+    store = LeaderboardStore(os.path.join(directory, "leaderboard.log"), os.path.join(directory, "leaderboard.json"),
+                             writer=writer)
+    count = iter(range(10 ** 9))
+
+    def step():
+        store.add("0", leaderboard_record(next(count)))
+        store.export_json()
+
+    def teardown():
+        writer.close()
+        shutil.rmtree(directory, ignore_errors=True)
+    return Bench(step, writer.flush, teardown)
+
+
+def report(name, before, after):
+    print(f"{name} 优化前: {before:.3f} ms/帧")
+    if after is None:
+        print(f"{name} 优化后: 跳过（未安装NumPy）")
+    else:
+        print(f"{name} 优化后: {after:.3f} ms/帧  加速比: {before / after:.1f}x")
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    enter_work_dir()
+    report("渐变背景", *bench_gradient(frames))
+    for count in (100, 5000):
+        report(f"粒子x{count}", *bench_particles(count, max(1, frames // 3)))
+    print(f"全部卡片同时翻牌: {bench_reveal_all(frames):.3f} ms/帧")
+
+
+if __name__ == "__main__":
+    main()
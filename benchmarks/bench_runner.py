@@ -0,0 +1,76 @@
+"""
+光州跑男 的单项基准，由 benchmarks/run.py 运行。
+
+每个基准使用新建的 Game，结果不受其他基准的运行顺序影响。
+"""
+import random
+
+import pygame
+
+from harness import benchmark
+
+import 光州跑男 as runner
+
+
+@benchmark("runner.draw_background", number=300)
+def setup_draw_background():
+    return runner.Game().draw_background
+
+
+@benchmark("runner.draw_ui", number=300)
+def setup_draw_ui():
+    return runner.Game().draw_ui
+
+
+@benchmark("runner.draw_crowd", number=300)
+def setup_draw_crowd():
+    game = runner.Game()
+    # 玩家加上 30 个跑动相位各不相同的跑者
+    random.seed(1)
+    crowd = [runner.Runner() for _ in range(30)]
+    for actor in crowd:
+        actor.x = actor.prev_x = random.randint(0, runner.SCREEN_WIDTH - actor.width)
+        actor.animation.phase = random.uniform(0, 10)
+
+    def step():
+        game.player.draw(game.screen, 0.5)
+        for actor in crowd:
+            actor.animation.advance()
+            actor.draw(game.screen, 0.5)
+    return step
+
+
+@benchmark("runner.obstacle_update", number=300)
+def setup_obstacle_update():
+    game = runner.Game()
+    # 高等级时屏幕上有大量障碍物，离开屏幕的立即在右侧补充
+    random.seed(1)
+    game.level = 10
+    game.spawn_rules = dict(runner.OBSTACLE_SPAWN_RULES)
+    game.obstacles = runner.create_obstacles()
+    for _ in range(200):
+        game.obstacles.spawn(random.randint(0, runner.SCREEN_WIDTH), 30, random.randint(20, 50))
+
+    def step():
+        game.update_obstacles()
+        while len(game.obstacles) < 200:
+            game.obstacles.spawn(runner.SCREEN_WIDTH, 30, random.randint(20, 50))
+    return step
+
+
+@benchmark("runner.obstacle_stress", number=100)
+def setup_obstacle_stress():
+    game = runner.Game()
+    # 修改生成规则，每步生成 30 个，屏幕上稳定保持约五千个障碍物，每步再做一次碰撞检测
+    random.seed(1)
+    game.level = 3
+    game.spawn_rules = dict(runner.OBSTACLE_SPAWN_RULES, interval=0, count=30, chance=1.0, min_level=1)
+    game.obstacles = runner.create_obstacles()
+    for _ in range(200):
+        game.update_obstacles()
+    player_rect = pygame.Rect(game.player.x, game.player.y, game.player.width, game.player.height)
+
+    def step():
+        game.update_obstacles()
+        game.obstacles.collide(player_rect)
+    return step
@@ -0,0 +1,43 @@
+"""
+Tool/Zoom.py 的单项基准，由 benchmarks/run.py 运行。
+
+字体查找直接调用 TextMagnifier.setup_fonts，不创建 Tk 窗口；
+文字放大走 Zoom 实际的显示路径：在隐藏的 Tk 窗口中调用 magnify_text 更新 Label，
+再用 update_idletasks 完成布局和重绘。没有显示器时跳过。
+"""
+import tkinter as tk
+
+from harness import Bench, Skip, benchmark
+
+import Zoom
+
+EXAMPLES = ["Hello 你好 World!", "Chinese Characters 汉字", "Magnification 放大效果", "Python Programming 编程"]
+
+
+def find_fonts():
+    magnifier = Zoom.TextMagnifier.__new__(Zoom.TextMagnifier)
+    magnifier.setup_fonts()
+    return magnifier
+
+
+@benchmark("zoom.font_discovery", number=20)
+def setup_font_discovery():
+    return find_fonts
+
+
+@benchmark("zoom.text_render", number=20)
+def setup_text_render():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise Skip(e)
+    root.withdraw()
+    magnifier = Zoom.TextMagnifier(root)
+    root.update_idletasks()
+
+    def step():
+        for text in EXAMPLES:
+            magnifier.text_var.set(text)
+            magnifier.magnify_text()
+            root.update_idletasks()
+    return Bench(step, teardown=root.destroy)
@@ -0,0 +1,145 @@
+"""
+基准测试框架：注册、计时、保存基线和对比。
+
+每个基准是一个 setup 函数，返回每次迭代执行的 step；
+setup 的耗时不计入结果。需要收尾的基准返回 Bench(step, flush, teardown)：
+flush 在每轮结束时调用（如等待后台线程写完），耗时单独记为 flush_ms，
+teardown 在全部轮次结束后调用（如关闭线程、删除临时目录）。每个基准先预热一次，再重复 repeat 轮，
+每轮执行 number 次，取每次迭代的中位数耗时（毫秒）作为结果。
+当前环境无法运行的基准在 setup 中抛出 Skip，会被跳过。
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "Game"))
+sys.path.insert(0, os.path.join(ROOT, "Tool"))
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10  # 比基线慢 10% 以上视为性能回退
+
+BENCHMARKS = {}  # 名称 -> (setup, 每轮次数)
+
+
+class Skip(Exception):
+    """基准在当前环境下无法运行（如没有显示器）"""
+
+
+class Bench:
+    def __init__(self, step, flush=None, teardown=None):
+        self.step = step
+        self.flush = flush
+        self.teardown = teardown
+
+
+def enter_work_dir():
+    """游戏会在当前目录读写排行榜和学习记录，基准在临时目录中运行，不改动真实的存档"""
+    os.chdir(tempfile.mkdtemp(prefix="genesis-bench-"))
+
+
+def benchmark(name, number=100):
+    """注册一个基准，被装饰的函数完成准备工作并返回 step"""
+    def register(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return register
+
+
+def measure(setup, number, repeat=DEFAULT_REPEAT):
+    bench = setup()
+    if not isinstance(bench, Bench):
+        bench = Bench(bench)
+    try:
+        bench.step()  # 预热（包括缓存的首次生成）
+        if bench.flush:
+            bench.flush()
+        rounds = []
+        flushes = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                bench.step()
+            rounds.append((time.perf_counter() - start) * 1000 / number)
+            if bench.flush:
+                start = time.perf_counter()
+                bench.flush()
+                flushes.append((time.perf_counter() - start) * 1000 / number)
+    finally:
+        if bench.teardown:
+            bench.teardown()
+    result = {
+        "median_ms": statistics.median(rounds),
+        "min_ms": min(rounds),
+        "stdev_ms": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+    if flushes:
+        result["flush_ms"] = statistics.median(flushes)  # 每次迭代留给 flush 的耗时
+    return result
+
+
+def run(names=None, repeat=DEFAULT_REPEAT, scale=1.0):
+    """运行选中的基准（默认全部），scale 调整每轮次数"""
+    results = {}
+    for name, (setup, number) in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        try:
+            results[name] = measure(setup, max(1, int(number * scale)), repeat)
+        except Skip as e:
+            print(f"{name:<36} 跳过: {e}")
+            continue
+        line = f"{name:<36} {results[name]['median_ms']:9.4f} ms  (±{results[name]['stdev_ms']:.4f})"
+        if "flush_ms" in results[name]:
+            line += f"  flush {results[name]['flush_ms']:.4f} ms"
+        print(line)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "date": time.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def save_baseline(path, results):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """与基线对比，返回性能回退的基准名称列表"""
+    regressions = []
+    print(f"\n{'基准':<34} {'基线':>10} {'本次':>10} {'变化':>8}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<36} {'-':>10} {result['median_ms']:10.4f}     新增")
+            continue
+        change = result["median_ms"] / base["median_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  回退"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  提升"
+        print(f"{name:<36} {base['median_ms']:10.4f} {result['median_ms']:10.4f} {change:+8.1%}{flag}")
+    return regressions
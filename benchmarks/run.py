@@ -0,0 +1,57 @@
+"""
+运行三个程序的基准套件，保存或对比 JSON 基线：
+    python benchmarks/run.py                                  # 运行全部基准
+    python benchmarks/run.py flashcard.card                   # 只运行名称包含该字符串的基准
+    python benchmarks/run.py --save benchmarks/baseline.json  # 保存为基线
+    python benchmarks/run.py --compare benchmarks/baseline.json --threshold 0.15
+
+对比时任一基准比基线慢 threshold 以上则以退出码 1 结束。
+缺少依赖（如 Pillow、tkinter）的程序会被跳过。
+"""
+import argparse
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import harness
+
+SUITES = ["bench_flashcard", "bench_runner", "bench_zoom"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基准测试")
+    parser.add_argument("names", nargs="*", help="只运行名称包含这些字符串的基准")
+    parser.add_argument("--save", metavar="PATH", help="把结果保存为基线")
+    parser.add_argument("--compare", metavar="PATH", help="与基线对比")
+    parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD,
+                        help="判定为回退的变慢比例，默认 0.10")
+    parser.add_argument("--repeat", type=int, default=harness.DEFAULT_REPEAT)
+    parser.add_argument("--scale", type=float, default=1.0, help="每轮次数的倍数，快速检查时可以调小")
+    args = parser.parse_args()
+
+    save = os.path.abspath(args.save) if args.save else None
+    baseline = harness.load_baseline(args.compare) if args.compare else None
+    harness.enter_work_dir()
+
+    for suite in SUITES:
+        try:
+            importlib.import_module(suite)
+        except ImportError as e:
+            print(f"跳过 {suite}: {e}")
+
+    results = harness.run(args.names, args.repeat, args.scale)
+    if save:
+        harness.save_baseline(save, results)
+        print(f"基线已保存到 {save}")
+    if baseline:
+        regressions = harness.compare(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项性能回退超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\n没有超过 {args.threshold:.0%} 的性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Game"))
+
+from leaderboard_store import COMPACT_FACTOR, LeaderboardStore
+
+
+def record(score):
+    return {"name": "玩家", "score": score, "time": 60, "moves": 20, "date": "2024-01-01 00:00"}
+
+
+class CompactionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open_store(self):
+        return LeaderboardStore(os.path.join(self.directory, "leaderboard.log"),
+                                os.path.join(self.directory, "leaderboard.json"), levels=1, top_n=3)
+
+    def test_compaction_releases_local_records(self):
+        first, second = self.open_store(), self.open_store()
+        for i in range(3 * COMPACT_FACTOR * 5):
+            (first if i % 2 else second).add("0", record(i))
+            second.refresh()
+        first.refresh()
+        self.assertFalse(first.compacting)
+        self.assertFalse(second.compacting)
+        # 压缩丢弃的低分记录不会一直留在 local 中
+        self.assertLess(len(first.local), 3 * COMPACT_FACTOR)
+        self.assertLess(len(second.local), 3 * COMPACT_FACTOR)
+        expected = sorted(range(3 * COMPACT_FACTOR * 5), reverse=True)[:3]
+        self.assertEqual([r["score"] for r in first.top("0")], expected)
+        self.assertEqual([r["score"] for r in second.top("0")], expected)
+
+    def test_top_survives_compaction(self):
+        store = self.open_store()
+        scores = [(i * 37) % 101 for i in range(100)]
+        for score in scores:
+            store.add("0", record(score))
+        store.refresh()
+        self.assertEqual([r["score"] for r in store.top("0")], sorted(scores, reverse=True)[:3])
+        self.assertEqual([r["score"] for r in self.open_store().top("0")], sorted(scores, reverse=True)[:3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+import wave
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Game"))
+
+import pygame
+
+from resources import ResourceManager
+
+
+def write_tone(path, seconds=1, rate=22050):
+    """写一段静音的 WAV 作为测试用的背景音乐"""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(struct.pack("<h", 0) * (rate * seconds))
+
+
+class MusicLoopTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "tone.wav")
+        write_tone(self.path)
+
+    def tearDown(self):
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+            pygame.mixer.quit()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_loop_waits_for_loading(self):
+        resources = ResourceManager()
+        resources.add_music("music", self.path, volume=0.5)
+        resources.loop("music")
+        self.assertEqual(resources.pending_loop, "music")
+
+        resources.start()
+        resources.futures["music"].result()
+        if not resources.audio_ready:
+            self.skipTest("没有可用的音频设备")
+        self.assertIsNone(resources.pending_loop)
+        self.assertEqual(resources.loaded["music"], self.path)  # 只登记路径，由 mixer.music 流式解码
+        self.assertTrue(pygame.mixer.music.get_busy())
+        self.assertAlmostEqual(pygame.mixer.music.get_volume(), 0.5, places=2)
+
+    def test_muted_never_plays(self):
+        resources = ResourceManager()
+        resources.add_music("music", self.path)
+        resources.start(muted=True)
+        resources.futures["music"].result()
+        resources.loop("music")
+        self.assertIsNone(resources.loaded["music"])
+        self.assertFalse(pygame.mixer.get_init())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Game"))
+
+from scheduler import DAY, RELEARN_DELAY, WordState
+
+
+class WordStateTest(unittest.TestCase):
+    def test_lapse_keeps_ease(self):
+        state = WordState("apple", "苹果", 0)
+        state.review(5, 0)
+        state.review(4, 0)
+        ease = state.ease
+        for quality in (0, 1, 2):
+            state.review(quality, 100)
+            self.assertEqual(state.ease, ease)
+            self.assertEqual(state.reps, 0)
+            self.assertEqual(state.due, 100 + RELEARN_DELAY)
+
+    def test_recall_updates_ease(self):
+        state = WordState("apple", "苹果", 0)
+        state.review(3, 0)
+        self.assertAlmostEqual(state.ease, 2.36)
+        self.assertEqual(state.due, DAY)
+        state.review(5, 0)
+        self.assertAlmostEqual(state.ease, 2.46)
+        self.assertEqual(state.interval, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()